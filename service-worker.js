@@ -10,9 +10,9 @@ const getProjectName = () => {
 };
 
 const PROJECT_NAME = getProjectName();
-// Use timestamp in cache name to force cache invalidation on each service worker update
-const CACHE_VERSION = Date.now();
-const CACHE_NAME = `${PROJECT_NAME}-v${CACHE_VERSION}`;
+// Stable cache name: entries are versioned individually by precache-manifest.json
+// (generated by tools/update-version), so a deploy only downloads what changed
+const CACHE_NAME = `${PROJECT_NAME}-precache`;
 
 // Get base path from service worker location
 const getBasePath = () => {
@@ -21,32 +21,116 @@ const getBasePath = () => {
 };
 const BASE_PATH = getBasePath();
 
-// Install event - skip waiting to activate immediately and clear old caches
+const PRECACHE_MANIFEST_URL = new URL('precache-manifest.json', self.location).href;
+// Revisions of the cached entries (url -> revision), stored in the cache itself
+const PRECACHE_STATE_URL = new URL('__precache-state', self.location).href;
+// The service worker only reinstalls when its own file changes, so the manifest is also
+// re-checked on navigation, at most once per interval
+const PRECACHE_CHECK_INTERVAL = 60 * 1000;
+let lastPrecacheCheck = 0;
+let precacheSync = null;
+// Versioned URLs (with ?v=<content hash>) that are safe to serve cache-first
+let precachedUrls = null;
+
+const readPrecacheState = async (cache) => {
+  const response = await cache.match(PRECACHE_STATE_URL);
+  if (!response) {
+    return {};
+  }
+  try {
+    return await response.json();
+  } catch (err) {
+    return {};
+  }
+};
+
+const syncPrecache = async () => {
+  let manifest;
+  try {
+    const response = await fetch(PRECACHE_MANIFEST_URL, { cache: 'no-store' });
+    if (!response.ok) {
+      return;
+    }
+    manifest = await response.json();
+  } catch (err) {
+    // Offline or no manifest (timestamp mode): keep whatever is cached
+    return;
+  }
+
+  const cache = await caches.open(CACHE_NAME);
+  const previous = await readPrecacheState(cache);
+  const next = {};
+  for (const entry of manifest.entries || []) {
+    next[new URL(entry.url, self.location).href] = entry.revision;
+  }
+
+  // Fetch only new or changed entries; unchanged ones stay in the cache
+  const changed = Object.keys(next).filter((url) => previous[url] !== next[url]);
+  const fetched = await Promise.all(changed.map(async (url) => {
+    try {
+      const response = await fetch(url, { cache: 'no-store' });
+      if (response.ok) {
+        await cache.put(url, response);
+        return true;
+      }
+    } catch (err) {
+      console.warn('Failed to precache:', url, err);
+    }
+    return false;
+  }));
+  // Entries that failed keep no revision, so they are retried on the next sync
+  changed.forEach((url, i) => {
+    if (!fetched[i]) {
+      delete next[url];
+    }
+  });
+
+  // Drop entries that are no longer in the manifest
+  await Promise.all(Object.keys(previous)
+    .filter((url) => !(url in next))
+    .map((url) => cache.delete(url)));
+
+  await cache.put(PRECACHE_STATE_URL, new Response(JSON.stringify(next), {
+    headers: { 'Content-Type': 'application/json' }
+  }));
+  precachedUrls = new Set(Object.keys(next));
+};
+
+const syncPrecacheOnce = () => {
+  if (!precacheSync) {
+    lastPrecacheCheck = Date.now();
+    precacheSync = syncPrecache().finally(() => {
+      precacheSync = null;
+    });
+  }
+  return precacheSync;
+};
+
+const getPrecachedUrls = async () => {
+  if (!precachedUrls) {
+    const cache = await caches.open(CACHE_NAME);
+    precachedUrls = new Set(Object.keys(await readPrecacheState(cache)));
+  }
+  return precachedUrls;
+};
+
+// Install event - precache the manifest entries and skip waiting to activate immediately
 self.addEventListener('install', (event) => {
   event.waitUntil(
-    caches.keys().then((cacheNames) => {
-      return Promise.all(
-        cacheNames.map((cacheName) => {
-          // Delete all old caches
-          if (cacheName.startsWith(`${PROJECT_NAME}-`)) {
-            return caches.delete(cacheName);
-          }
-        })
-      );
-    }).then(() => {
+    syncPrecacheOnce().then(() => {
       self.skipWaiting();
     })
   );
 });
 
-// Activate event - clean up old caches
+// Activate event - clean up old caches (timestamped caches from previous versions)
 self.addEventListener('activate', (event) => {
   event.waitUntil(
     caches.keys().then((cacheNames) => {
       return Promise.all(
         cacheNames.map((cacheName) => {
-          // Delete all old caches for this project
-          if (cacheName.startsWith(`${PROJECT_NAME}-`)) {
+          // Delete all old caches for this project, keeping the precache
+          if (cacheName.startsWith(`${PROJECT_NAME}-`) && cacheName !== CACHE_NAME) {
             return caches.delete(cacheName);
           }
         })
@@ -90,6 +174,27 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
+  // Navigations: check for a new deploy in the background (throttled)
+  if (event.request.mode === 'navigate' && Date.now() - lastPrecacheCheck > PRECACHE_CHECK_INTERVAL) {
+    event.waitUntil(syncPrecacheOnce());
+  }
+
+  // Cache first for exact versioned matches: the ?v=<hash> URL identifies the content,
+  // so a cached copy can never be stale
+  if (url.searchParams.has('v')) {
+    event.respondWith(
+      getPrecachedUrls().then((urls) => {
+        if (!urls.has(url.href)) {
+          return fetch(event.request);
+        }
+        return caches.open(CACHE_NAME)
+          .then((cache) => cache.match(url.href))
+          .then((cachedResponse) => cachedResponse || fetch(event.request));
+      })
+    );
+    return;
+  }
+
   // Network first strategy for HTML, JS, and CSS files
   // Always fetch from network - never cache these files
   if (event.request.url.includes('.html') || 
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Sincroniza los componentes comunes desde nrd-common a los proyectos NRD.
+Uso: python3 sync-common.py [proyecto ...]
+Si no se especifica proyecto, sincroniza a todos los nrd-* con index.html (misma detección que el servidor).
+
+Solo se copian los archivos cuyo contenido cambió (reemplazo atómico): los que ya están al día no se
+tocan, así el live reload del servidor no recarga por archivos que no cambiaron.
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+COMMON_DIR = Path(__file__).parent.resolve()
+PROJECTS_DIR = COMMON_DIR.parent
+
+# (origen relativo a nrd-common, destino relativo al proyecto, obligatorio)
+COMMON_FILES = (
+    ('modules/core/logger.js', 'common/modules/core/logger.js', True),
+    ('modules/core/config.js', 'common/modules/core/config.js', True),
+    ('modules/core/app-init.js', 'common/modules/core/app-init.js', True),
+    ('modules/core/index.js', 'common/modules/core/index.js', False),
+    ('modules/ui/modal.js', 'common/modules/ui/modal.js', True),
+    ('modules/ui/spinner.js', 'common/modules/ui/spinner.js', True),
+    ('modules/ui/index.js', 'common/modules/ui/index.js', True),
+    ('modules/utils/format.js', 'common/modules/utils/format.js', True),
+    ('modules/utils/dom.js', 'common/modules/utils/dom.js', True),
+    ('modules/utils/date.js', 'common/modules/utils/date.js', True),
+    ('modules/utils/index.js', 'common/modules/utils/index.js', True),
+    ('modules/services/auth.js', 'common/modules/services/auth.js', True),
+    ('modules/services/navigation.js', 'common/modules/services/navigation.js', True),
+    ('modules/services/data-loader.js', 'common/modules/services/data-loader.js', True),
+    ('modules/services/index.js', 'common/modules/services/index.js', True),
+    ('README.md', 'common/README.md', False),
+    ('service-worker.js', 'service-worker.js', False),
+)
+# tools/ se copia completo (sin cachés de Python)
+TOOLS_DIR = 'tools'
+TOOLS_IGNORE_DIRS = {'__pycache__'}
+TOOLS_IGNORE_SUFFIXES = ('.pyc', '.pyo')
+
+LOGGER_DEST = 'common/modules/core/logger.js'
+LOGGER_INSTANCE_TEMPLATE = """
+// Create and export default logger instance for {name}
+export const logger = new Logger('{name}', {{
+  logLevel: LOG_LEVELS.DEBUG, // Change to INFO in production
+  enableColors: true,
+  enableTimestamp: true,
+  enableStack: false
+}});
+
+// Maintain compatibility with window.logger for existing code
+if (typeof window !== 'undefined') {{
+  window.logger = logger;
+}}
+"""
+_LOGGER_NAME = re.compile(r"new Logger\('[^']*'")
+
+
+def discover_projects(projects_dir=PROJECTS_DIR):
+    """Proyectos nrd-* con index.html (como el servidor), sin contar nrd-common."""
+    return sorted(p.name for p in projects_dir.glob('nrd-*')
+                  if p.is_dir() and (p / 'index.html').exists() and p.resolve() != COMMON_DIR)
+
+
+def display_name(project):
+    """nrd-control-cajas -> NRD Control Cajas"""
+    words = project.replace('nrd-', '', 1).split('-')
+    return 'NRD ' + ' '.join(w[:1].upper() + w[1:] for w in words if w)
+
+
+def customize_logger(source, project):
+    """Contenido de logger.js con el nombre del proyecto (se aplica antes de comparar con el destino)."""
+    name = display_name(project)
+    text = source.decode('utf-8')
+    if 'export const logger = new Logger' in text:
+        text = _LOGGER_NAME.sub(lambda m: f"new Logger('{name}'", text)
+    elif 'export const logger' not in text:
+        text += LOGGER_INSTANCE_TEMPLATE.format(name=name)
+    return text.encode('utf-8')
+
+
+class SourceFile:
+    """Archivo de nrd-common leído una sola vez para todos los proyectos."""
+
+    def __init__(self, path, dest):
+        self.path = path
+        self.dest = dest
+        self.data = path.read_bytes()
+        self.mode = path.stat().st_mode & 0o777
+
+
+def collect_sources():
+    """Devuelve (archivos a sincronizar, avisos por archivos obligatorios que faltan)."""
+    sources = []
+    warnings = []
+    for source, dest, required in COMMON_FILES:
+        path = COMMON_DIR / source
+        if path.is_file():
+            sources.append(SourceFile(path, dest))
+        elif required:
+            warnings.append(f"no existe {source} en nrd-common")
+    tools_root = COMMON_DIR / TOOLS_DIR
+    for dirpath, dirnames, filenames in os.walk(tools_root):
+        dirnames[:] = sorted(d for d in dirnames if d not in TOOLS_IGNORE_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith(TOOLS_IGNORE_SUFFIXES):
+                continue
+            path = Path(dirpath) / filename
+            sources.append(SourceFile(path, f'{TOOLS_DIR}/{path.relative_to(tools_root).as_posix()}'))
+    return sources, warnings
+
+
+def _same_content(path, data):
+    """Compara el destino con los bytes ya leídos: primero el tamaño, después el contenido."""
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def _atomic_write(path, data, mode):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def sync_project(project, sources, projects_dir=PROJECTS_DIR):
+    """Sincroniza un proyecto. Devuelve (archivos copiados, archivos sin cambios, errores)."""
+    project_path = projects_dir / project
+    copied, errors = [], []
+    unchanged = 0
+    for source in sources:
+        data = customize_logger(source.data, project) if source.dest == LOGGER_DEST else source.data
+        target = project_path / source.dest
+        try:
+            if _same_content(target, data):
+                unchanged += 1
+                # Solo permisos (p. ej. +x en scripts de tools/): chmod no toca el contenido ni el mtime
+                if target.stat().st_mode & 0o777 != source.mode:
+                    os.chmod(target, source.mode)
+                continue
+            _atomic_write(target, data, source.mode)
+            copied.append(source.dest)
+        except OSError as e:
+            errors.append(f"{source.dest}: {e}")
+    return copied, unchanged, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza los componentes comunes de nrd-common a los proyectos NRD")
+    parser.add_argument('projects', nargs='*', metavar='proyecto',
+                        help="proyectos a sincronizar (por defecto, todos los nrd-*)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    projects = args.projects or discover_projects()
+    if not args.projects:
+        print("🔄 Sincronizando componentes comunes a todos los proyectos...")
+        print()
+
+    sources, warnings = collect_sources()
+    for warning in warnings:
+        print(f"⚠️  {warning}")
+
+    missing = [p for p in projects if not (PROJECTS_DIR / p).is_dir()]
+    for project in missing:
+        print(f"⚠️  Proyecto {project} no encontrado, saltando...")
+    projects = [p for p in projects if p not in missing]
+
+    failed = bool(warnings)
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(projects)))) as pool:
+        results = list(pool.map(lambda p: sync_project(p, sources), projects))
+    for project, (copied, unchanged, errors) in zip(projects, results):
+        if errors:
+            failed = True
+            print(f"❌ {project}: {len(errors)} error(es)")
+            for error in errors:
+                print(f"   {error}")
+        if copied:
+            print(f"📦 {project}: {len(copied)} archivo(s) actualizado(s), {unchanged} sin cambios")
+            for dest in copied:
+                print(f"   → {dest}")
+        elif not errors:
+            print(f"✅ {project}: sin cambios ({unchanged} archivos)")
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print()
+    print(f"✨ Sincronización completada ({len(projects)} proyecto(s) en {elapsed_ms:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
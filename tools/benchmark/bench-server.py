@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Benchmark reproducible del servidor multi-proyecto NRD (funciona sin red).
+Crea un árbol sintético con N proyectos nrd-*, M módulos por proyecto y un bundle grande,
+levanta nrd-system-server.py en un puerto local y lo carga con clientes concurrentes
+(assets estáticos, bundle, HTML con live reload, /_nrd_live y la página índice).
+El bundle (6 MB por defecto, más que ASSET_CACHE_MAX_ENTRY_BYTES, con contenido variado) se mide
+sin Accept-Encoding (bundle: sendfile del original) y con gzip (bundle-gz: su hermano .gz).
+Reporta throughput, latencias p50/p95/p99, el tiempo de arranque y el CPU del servidor en reposo
+(watcher), y guarda los resultados en JSON para comparar entre commits.
+Con --in-process el servidor se levanta con create_server() dentro de este proceso (sin subproceso).
+Uso: python3 bench-server.py [--projects N] [--modules M] [--duration S] [--output results.json]
+Ejemplo: python3 bench-server.py --output bench-antes.json
+Ejemplo: python3 bench-server.py --compare bench-antes.json -- --workers 0
+Ejemplo: python3 bench-server.py --in-process -- --workers 8
+"""
+
+import argparse
+import gzip
+import http.client
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+SCENARIOS = ('static', 'bundle', 'bundle-gz', 'html', 'live', 'index')
+GZIP_HEADERS = {'Accept-Encoding': 'gzip'}
+# Cabeceras por escenario (por defecto GZIP_HEADERS, como un navegador)
+SCENARIO_HEADERS = {'bundle': {}}
+
+
+def build_tree(root, num_projects, num_modules, bundle_kb):
+    """Genera los proyectos sintéticos y devuelve {proyecto: [urls de módulos]}."""
+    module_urls = {}
+    module_body = ''.join(f'export function helper{i}(value) {{ return value * {i} + {i % 7}; }}\n'
+                          for i in range(60))
+    # Contenido variado (literales pseudoaleatorios, reproducibles): comprime como código real, no 1000:1
+    rng = random.Random(bundle_kb)
+    bundle_lines, size, i = [], 0, 0
+    while size < bundle_kb * 1024:
+        line = f'export const nrdBench{i} = ["{rng.getrandbits(128):032x}", {rng.random()!r}, {i}];\n'
+        bundle_lines.append(line)
+        size += len(line)
+        i += 1
+    bundle = ''.join(bundle_lines)
+    bundle_gz = gzip.compress(bundle.encode('utf-8'), 6, mtime=0)
+    for p in range(1, num_projects + 1):
+        name = f'nrd-bench-{p:02d}'
+        project = root / name
+        (project / 'modules').mkdir(parents=True)
+        (project / 'assets').mkdir()
+        urls = []
+        for m in range(num_modules):
+            module = project / 'modules' / f'mod-{m:03d}.js'
+            imports = f"import {{ helper1 }} from './mod-{m + 1:03d}.js';\n" if m + 1 < num_modules else ''
+            module.write_text(imports + module_body, encoding='utf-8')
+            urls.append(f'/{name}/modules/mod-{m:03d}.js?v=1')
+        (project / 'assets' / 'styles.css').write_text('body { margin: 0; }\n' * 200, encoding='utf-8')
+        (project / 'assets' / 'bundle.js').write_text(bundle, encoding='utf-8')
+        # Hermano .gz como el de export-static: el servidor lo usa para archivos fuera de la caché
+        (project / 'assets' / 'bundle.js.gz').write_bytes(bundle_gz)
+        scripts = '\n'.join(f'  <script type="module" src="modules/mod-{m:03d}.js?v=1"></script>'
+                            for m in range(min(num_modules, 10)))
+        (project / 'index.html').write_text(f'''<!DOCTYPE html>
+<html lang="es">
+<head>
+  <meta charset="UTF-8">
+  <title>{name}</title>
+  <link rel="stylesheet" href="assets/styles.css?v=1">
+</head>
+<body>
+  <div id="app">{'<p>contenido</p>' * 200}</div>
+{scripts}
+</body>
+</html>
+''', encoding='utf-8')
+        module_urls[name] = urls
+    return module_urls
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/_nrd_metrics')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def start_in_process(server_script, projects_dir, port, server_args, access_log):
+    """Importa el script del servidor y lo arranca en un thread de este proceso; devuelve el servidor."""
+    spec = importlib.util.spec_from_file_location('nrd_system_server', server_script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # En proceso solo aplican las opciones de create_server (no --processes ni --pid-file)
+    options_parser = argparse.ArgumentParser(prog='bench-server.py --in-process --')
+    options_parser.add_argument('--workers', type=int, default=module.SERVER_WORKERS)
+    options_parser.add_argument('--production', action='store_true')
+    options = options_parser.parse_args(server_args)
+    # Con access log el servidor no escribe una línea por request en stderr
+    server = module.create_server(projects_dir, port, host='127.0.0.1', workers=options.workers,
+                                  production=options.production, access_log=access_log)
+    return server.start()
+
+
+def process_cpu_seconds(pid):
+    """CPU (user + system) consumido por el proceso, leído de /proc. None si no está disponible."""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='ascii') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(port, name, paths, concurrency, duration, headers=GZIP_HEADERS):
+    """Carga el servidor con `concurrency` clientes keep-alive durante `duration` segundos."""
+    latencies = []
+    totals = {'requests': 0, 'errors': 0, 'bytes': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        local_latencies, requests, errors, received = [], 0, 0, 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.monotonic() < deadline:
+            path = rng.choice(paths)
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                if response.status >= 400:
+                    errors += 1
+                received += len(body)
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                continue
+            local_latencies.append(time.perf_counter() - started)
+            requests += 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            totals['requests'] += requests
+            totals['errors'] += errors
+            totals['bytes'] += received
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'scenario': name,
+        'requests': totals['requests'],
+        'errors': totals['errors'],
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(totals['requests'] / elapsed, 1),
+        'throughput_mb_s': round(totals['bytes'] / elapsed / (1024 * 1024), 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+    }
+
+
+def git_commit(repo_dir):
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir,
+                                capture_output=True, text=True, check=False)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    base = {r['scenario']: r for r in (baseline or {}).get('scenarios', [])}
+    print(f"{'escenario':<10} {'req/s':>10} {'MB/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for r in results['scenarios']:
+        line = (f"{r['scenario']:<10} {r['throughput_rps']:>10} {r['throughput_mb_s']:>8} "
+                f"{r['p50_ms']!s:>9} {r['p95_ms']!s:>9} {r['p99_ms']!s:>9} {r['errors']:>8}")
+        old = base.get(r['scenario'])
+        if old and old.get('throughput_rps') and old.get('p95_ms') and r['p95_ms'] is not None:
+            rps_delta = (r['throughput_rps'] / old['throughput_rps'] - 1) * 100
+            p95_delta = (r['p95_ms'] / old['p95_ms'] - 1) * 100
+            line += f"   (req/s {rps_delta:+.1f}%, p95 {p95_delta:+.1f}%)"
+        print(line)
+    if results.get('startup_ms') is not None:
+        print(f"Arranque: {results['startup_ms']} ms")
+    idle = results['idle']
+    if idle['cpu_percent'] is not None:
+        print(f"CPU en reposo (watcher): {idle['cpu_percent']}% durante {idle['seconds']} s")
+    if idle.get('watcher'):
+        print(f"Watcher: backend={idle['watcher'].get('backend')} "
+              f"último scan={idle['watcher'].get('last_scan_seconds')} s")
+
+
+def main():
+    script_dir = Path(__file__).parent.resolve()
+    default_server = script_dir.parent / 'server' / 'nrd-system-server.py'
+    parser = argparse.ArgumentParser(description="Benchmark del servidor multi-proyecto NRD")
+    parser.add_argument('--projects', type=int, default=8, help="proyectos nrd-* sintéticos (por defecto 8)")
+    parser.add_argument('--modules', type=int, default=40, help="módulos JS por proyecto (por defecto 40)")
+    parser.add_argument('--bundle-kb', type=int, default=6144,
+                        help="tamaño del bundle grande en KB (por defecto 6144, fuera de la caché del servidor)")
+    parser.add_argument('--concurrency', type=int, default=16, help="clientes concurrentes por escenario")
+    parser.add_argument('--duration', type=float, default=5.0, help="segundos por escenario")
+    parser.add_argument('--idle-seconds', type=float, default=5.0, help="segundos midiendo CPU en reposo")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="escenarios separados por coma")
+    parser.add_argument('--server', default=str(default_server), help="script del servidor a medir")
+    parser.add_argument('--port', type=int, default=0, help="puerto local (0 = uno libre)")
+    parser.add_argument('--output', help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--compare', help="JSON de una corrida anterior para mostrar diferencias")
+    parser.add_argument('--keep-tree', action='store_true', help="no borrar el árbol sintético")
+    parser.add_argument('--in-process', action='store_true',
+                        help="levantar el servidor con create_server() en este proceso (solo --workers y --production)")
+    parser.add_argument('server_args', nargs=argparse.REMAINDER,
+                        help="argumentos extra para el servidor, después de --")
+    args = parser.parse_args()
+    server_args = [a for a in args.server_args if a != '--']
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"❌ Escenarios desconocidos: {', '.join(sorted(unknown))}")
+        return 1
+
+    tree = Path(tempfile.mkdtemp(prefix='nrd-bench-'))
+    port = args.port or free_port()
+    log_path = tree / 'server.log'
+    process = None
+    server = None
+    try:
+        print(f"🏗️  Generando {args.projects} proyectos x {args.modules} módulos en {tree}")
+        module_urls = build_tree(tree, args.projects, args.modules, args.bundle_kb)
+        project_names = sorted(module_urls)
+        paths = {
+            'static': [url for urls in module_urls.values() for url in urls]
+                      + [f'/{name}/assets/styles.css?v=1' for name in project_names],
+            'bundle': [f'/{name}/assets/bundle.js?v=1' for name in project_names],
+            'bundle-gz': [f'/{name}/assets/bundle.js?v=1' for name in project_names],
+            'html': [f'/{name}/' for name in project_names],
+            'live': ['/_nrd_live'],
+            'index': ['/'],
+        }
+
+        print(f"🚀 Iniciando servidor en el puerto {port}{' (en proceso)' if args.in_process else ''}")
+        started = time.perf_counter()
+        if args.in_process:
+            server = start_in_process(args.server, tree, port, server_args, str(tree / 'access.log'))
+            server_pid = os.getpid()
+        else:
+            with open(log_path, 'w') as log:
+                process = subprocess.Popen(
+                    [sys.executable, args.server, str(port), '--projects-dir', str(tree)] + server_args,
+                    cwd=tree, stdout=log, stderr=subprocess.STDOUT)
+            if not wait_for_server(port, process):
+                print("❌ El servidor no respondió; últimas líneas del log:")
+                print(log_path.read_text(errors='replace')[-2000:])
+                return 1
+            server_pid = process.pid
+        startup_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"   Listo en {startup_ms} ms")
+
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(Path(args.server).resolve().parent),
+            'python': sys.version.split()[0],
+            'params': {'projects': args.projects, 'modules': args.modules, 'bundle_kb': args.bundle_kb,
+                       'concurrency': args.concurrency, 'duration': args.duration,
+                       'server_args': server_args, 'in_process': args.in_process},
+            'startup_ms': startup_ms,
+            'scenarios': [],
+        }
+        for name in scenarios:
+            print(f"⏱️  Escenario {name}...")
+            results['scenarios'].append(run_scenario(port, name, paths[name], args.concurrency, args.duration,
+                                                     SCENARIO_HEADERS.get(name, GZIP_HEADERS)))
+
+        # CPU en reposo: sin requests, lo que consume el servidor es el watcher (y los threads de fondo)
+        cpu_before = process_cpu_seconds(server_pid)
+        time.sleep(args.idle_seconds)
+        cpu_after = process_cpu_seconds(server_pid)
+        idle = {'seconds': args.idle_seconds, 'cpu_percent': None, 'watcher': None}
+        if cpu_before is not None and cpu_after is not None:
+            idle['cpu_percent'] = round((cpu_after - cpu_before) / args.idle_seconds * 100, 2)
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/_nrd_metrics')
+            idle['watcher'] = json.loads(conn.getresponse().read()).get('watcher')
+            conn.close()
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        results['idle'] = idle
+
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as f:
+                baseline = json.load(f)
+            print(f"\n📊 Resultados (comparado con {baseline.get('commit') or args.compare}):")
+        else:
+            print("\n📊 Resultados:")
+        print_results(results, baseline)
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n💾 Resultados guardados en {args.output}")
+        return 0
+    finally:
+        if server is not None:
+            server.stop()
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if args.keep_tree:
+            print(f"📁 Árbol sintético conservado en {tree}")
+        else:
+            shutil.rmtree(tree, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,806 @@
+#!/usr/bin/env python3
+"""
+Exporta proyectos NRD como un directorio estático listo para desplegar (producción).
+Por cada proyecto escribe en <proyecto>/dist/static (o en --output/<proyecto>):
+  - JS, CSS y HTML minificados (conservador: comentarios, sangría y espacios; no renombra nada)
+  - una copia con el hash de contenido en el nombre (app.js -> app.3f2a1b9c0d.js) para cachear
+    como inmutable; el nombre original se mantiene para las referencias que no se pueden reescribir
+  - referencias reescritas a los nombres con hash: src/href del HTML, url() y @import del CSS,
+    import/export ... from, import() y new URL() del JS, e iconos de manifest.json
+  - hermanos .gz de los archivos de texto (el servidor NRD los sirve tal cual)
+  - asset-manifest.json (original -> con hash), precache-manifest.json y version.json
+Es incremental: <proyecto>/.cache/export-static.json (fuera de lo publicado) guarda por archivo el hash
+de entrada y el de su salida; si el archivo y los nombres de lo que referencia no cambiaron, se reutiliza
+la salida sin leerlo.
+Las páginas, service-worker.js y manifest.json conservan su nombre. Solo se publican assets web
+(PUBLISHED_EXTENSIONS): notas, scripts y archivos de trabajo del proyecto quedan fuera.
+Uso: python3 export-static.py [proyecto ...] [--all] [--output DIR] [--no-minify] [--no-gzip] [--jobs N] [--profile]
+--profile (o NRD_PROFILE=1) imprime los tiempos por fase (discovery, scan, render, write), sumando los de cada proceso.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+HASH_LENGTH = 10  # caracteres hex del hash en los nombres
+EXPORT_FORMAT = 2  # subirlo invalida las salidas cacheadas (cambios en minificadores o reescritura)
+DEFAULT_OUTPUT = 'dist/static'  # relativo al proyecto
+CACHE_DIR = '.cache'  # relativo al proyecto: la caché nunca va en el directorio publicado
+CACHE_NAME = 'export-static.json'
+LEGACY_CACHE_NAME = '.export-cache.json'  # versiones anteriores la dejaban dentro de la salida
+ASSET_MANIFEST_NAME = 'asset-manifest.json'
+PRECACHE_MANIFEST_NAME = 'precache-manifest.json'
+VERSION_NAME = 'version.json'
+GZIP_MIN_SIZE = 1024  # como el servidor: por debajo no compensa
+
+IGNORE_DIRS = {'tools', 'node_modules', '__pycache__'}
+IGNORE_FILES = {'version-manifest.json', PRECACHE_MANIFEST_NAME, VERSION_NAME,
+                'package.json', 'package-lock.json', 'webpack.config.js'}
+# Se publican con su nombre: los pide el navegador por URL fija
+STABLE_NAMES = {'service-worker.js', 'manifest.json', 'favicon.ico', 'robots.txt'}
+HASHED_EXTENSIONS = {'.js', '.mjs', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif',
+                     '.ico', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp3', '.mp4', '.webm'}
+GZIP_EXTENSIONS = {'.html', '.js', '.mjs', '.css', '.json', '.webmanifest', '.svg', '.txt', '.xml'}
+# Solo se publican assets web: notas, scripts, parches o datos de trabajo (.md, .py, .patch, .jsonl) no
+PUBLISHED_EXTENSIONS = HASHED_EXTENSIONS | GZIP_EXTENSIONS | {
+    '.htm', '.bmp', '.ogg', '.wav', '.m4a', '.pdf', '.csv', '.wasm', '.webm', '.vtt'}
+KIND_BY_EXTENSION = {'.html': 'html', '.js': 'js', '.mjs': 'js', '.css': 'css',
+                     '.json': 'json', '.webmanifest': 'json'}
+
+# Referencias reescribibles por tipo de archivo; el grupo url es lo que se sustituye
+_HTML_REF = re.compile(r'''(?P<pre>\b(?:src|href|data-src|poster)\s*=\s*(?P<q>["']))(?P<url>[^"'<>]+)(?P=q)''',
+                       re.IGNORECASE)
+_CSS_REF = re.compile(r'''(?P<pre>url\(\s*(?P<q>["']?))(?P<url>[^"')\s]+)(?P=q)\s*\)'''
+                      r'''|(?P<pre2>@import\s+(?P<q2>["']))(?P<url2>[^"']+)(?P=q2)''')
+_JS_REF = re.compile(r'''(?P<pre>(?:\bfrom|\bimport\s*\(|(?<![\w$.])import|\bnew\s+URL\()\s*(?P<q>["']))'''
+                     r'''(?P<url>[^"'\n]+)(?P=q)''')
+_JSON_REF = re.compile(r'''(?P<pre>"src"\s*:\s*(?P<q>"))(?P<url>[^"]+)(?P=q)''')
+_REF_PATTERNS = {'html': (_HTML_REF, _JS_REF), 'css': (_CSS_REF,), 'js': (_JS_REF,), 'json': (_JSON_REF,)}
+_EXTERNAL_URL = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)')
+_CACHE_BUST = re.compile(r'(?:^|&)v=[^&]*')
+
+
+# Instrumentación compartida (tools/profiling/nrd_profiling.py): un solo profiler por proceso
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'profiling'))
+import nrd_profiling as profiling
+
+# --- Minificadores ------------------------------------------------------------------------------
+
+_JS_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                      'throw', 'instanceof', 'yield', 'await'}
+_JS_TIGHT = set('{}()[];,')  # junto a estos un espacio nunca hace falta
+_JS_NO_NEWLINE_AFTER = set('{(,;[')  # aquí no puede terminar una sentencia (ASI)
+_JS_NO_NEWLINE_BEFORE = set('})],;')
+
+
+def _skip_quoted(source, i):
+    """Índice tras el string '...' o "..." que empieza en i."""
+    quote = source[i]
+    i += 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote or ch == '\n':
+            return i + 1
+        i += 1
+    return n
+
+
+def _skip_template(source, i):
+    """Índice tras el template literal que empieza en i (con ${...} anidados)."""
+    i += 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+        elif ch == '`':
+            return i + 1
+        elif source.startswith('${', i):
+            i = _skip_code_block(source, i + 2)
+        else:
+            i += 1
+    return n
+
+
+def _skip_code_block(source, i):
+    """Índice tras la llave que cierra el ${ abierto antes de i (saltando strings anidados)."""
+    depth = 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch in '"\'':
+            i = _skip_quoted(source, i)
+            continue
+        if ch == '`':
+            i = _skip_template(source, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _skip_regex(source, i):
+    """Índice tras el literal /regex/flags que empieza en i."""
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '\n':
+            return i  # no era una regex: se copia tal cual hasta el salto de línea
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            i += 1
+            while i < n and (source[i].isalnum() or source[i] in '_$'):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def minify_js(source):
+    """Quita comentarios (salvo /*! ... */), sangría y espacios sobrantes sin tocar strings,
+    templates ni regex. Conserva los saltos de línea donde podrían terminar una sentencia."""
+    out = []
+    last = ''  # último carácter significativo emitido
+    word = ''  # última palabra emitida (para distinguir regex de división)
+    pending = None  # espacio pendiente: ' ' o '\n'
+    i, n = 0, len(source)
+
+    def emit(text):
+        nonlocal pending, last
+        if pending and out:
+            first = text[0]
+            if pending == '\n':
+                if last in _JS_NO_NEWLINE_AFTER or first in _JS_NO_NEWLINE_BEFORE:
+                    pending = ' ' if not (last in _JS_TIGHT or first in _JS_TIGHT) else None
+                if pending:
+                    out.append(pending)
+            elif not (last in _JS_TIGHT or first in _JS_TIGHT):
+                out.append(' ')
+        pending = None
+        out.append(text)
+        last = text[-1]
+
+    while i < n:
+        ch = source[i]
+        if ch.isspace():
+            if ch == '\n' or pending == '\n':
+                pending = '\n'
+            elif pending is None:
+                pending = ' '
+            i += 1
+            continue
+        if ch in '"\'':
+            j = _skip_quoted(source, i)
+        elif ch == '`':
+            j = _skip_template(source, i)
+        elif ch == '/' and source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j < 0 else j
+            continue
+        elif ch == '/' and source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            j = n if j < 0 else j + 2
+            if source.startswith('/*!', i):
+                emit(source[i:j])
+            elif '\n' in source[i:j]:
+                pending = '\n'  # para ASI un comentario multilínea cuenta como salto de línea
+            elif pending is None:
+                pending = ' '
+            i = j
+            continue
+        elif ch == '/' and (not out or last in _JS_REGEX_PREFIX or word in _JS_REGEX_KEYWORDS):
+            j = _skip_regex(source, i)
+        elif ch.isalnum() or ch in '_$':
+            j = i + 1
+            while j < n and (source[j].isalnum() or source[j] in '_$'):
+                j += 1
+            emit(source[i:j])
+            word = source[i:j]
+            i = j
+            continue
+        else:
+            j = i + 1
+        emit(source[i:j])
+        word = ''
+        i = j
+    if out:
+        out.append('\n')
+    return ''.join(out)
+
+
+_CSS_STRING_OR_COMMENT = re.compile(r'''(?P<str>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|(?P<comment>/\*.*?\*/)''',
+                                    re.DOTALL)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_TIGHT = re.compile(r'\s*([{};,>])\s*')
+_CSS_AFTER_COLON = re.compile(r':\s+')
+
+
+def minify_css(source):
+    """Quita comentarios (salvo /*! ... */) y espacios sobrantes; los strings quedan intactos."""
+    out = []
+    code = []  # trozos fuera de strings, se compactan juntos
+
+    def flush():
+        text = _CSS_SPACE.sub(' ', ''.join(code))
+        out.append(_CSS_AFTER_COLON.sub(':', _CSS_TIGHT.sub(r'\1', text)))
+        code.clear()
+
+    position = 0
+    for m in _CSS_STRING_OR_COMMENT.finditer(source):
+        code.append(source[position:m.start()])
+        position = m.end()
+        if m.group('str') is not None or m.group(0).startswith('/*!'):
+            flush()
+            out.append(m.group(0))
+        else:
+            code.append(' ')
+    code.append(source[position:])
+    flush()
+    css = ''.join(out).replace(';}', '}')
+    return css.strip() + '\n'
+
+
+_HTML_RAW_BLOCK = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if|<!|#).*?-->', re.DOTALL)
+_HTML_SPACE = re.compile(r'\s+')
+_HTML_TAG = re.compile(r'<[!/]?([a-zA-Z][\w:-]*)[^<>]*>')
+# Entre dos de estas etiquetas el espacio no se ve (cajas de bloque o elementos que no se pintan)
+_HTML_BLOCK_TAGS = frozenset((
+    'doctype', 'html', 'head', 'body', 'title', 'meta', 'link', 'base', 'script', 'style', 'noscript',
+    'template', 'address', 'article', 'aside', 'blockquote', 'details', 'dialog', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'thead', 'tbody', 'tfoot',
+    'tr', 'td', 'th', 'caption', 'colgroup', 'col', 'ul', 'textarea'))
+_HTML_SCRIPT_TYPE = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]+)''', re.IGNORECASE)
+_JS_SCRIPT_TYPES = {'module', 'text/javascript', 'application/javascript'}
+
+
+def minify_html(source):
+    """Quita comentarios y espacios; minifica <script> y <style> en línea y no toca <pre>/<textarea>.
+
+    Los espacios entre dos etiquetas de bloque se eliminan; el resto (texto, elementos en línea)
+    queda en un solo carácter, un salto de línea si lo había, así el render no cambia."""
+    out = []
+    position = 0
+
+    def collapse(text, before='html', after='html'):
+        # before/after: etiqueta pegada al inicio/fin del fragmento ('html' = inicio/fin del documento)
+        text = _HTML_COMMENT.sub('', text)
+
+        def space(m):
+            start, end = m.span()
+            if start == 0:
+                previous = before
+            elif text[start - 1] == '>':
+                tag = _HTML_TAG.match(text, text.rfind('<', 0, start))
+                previous = tag.group(1).lower() if tag and tag.end() == start else ''
+            else:
+                previous = ''
+            if end == len(text):
+                following = after
+            else:
+                tag = _HTML_TAG.match(text, end)
+                following = tag.group(1).lower() if tag else ''
+            if previous in _HTML_BLOCK_TAGS and following in _HTML_BLOCK_TAGS:
+                return ''
+            return '\n' if '\n' in m.group(0) else ' '
+
+        return _HTML_SPACE.sub(space, text)
+
+    tag = 'html'
+    for m in _HTML_RAW_BLOCK.finditer(source):
+        out.append(collapse(source[position:m.start()], tag, m.group(2).lower()))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == 'style':
+            body = minify_css(body).strip()
+        elif tag == 'script' and body.strip():
+            script_type = _HTML_SCRIPT_TYPE.search(open_tag)
+            if script_type is None or script_type.group(1).lower() in _JS_SCRIPT_TYPES:
+                body = minify_js(body).strip()
+        open_tag = _HTML_SPACE.sub(' ', open_tag)
+        out.append(f'{open_tag}{body}{close_tag}')
+        position = m.end()
+    out.append(collapse(source[position:], tag))
+    return ''.join(out).strip() + '\n'
+
+
+_MINIFIERS = {'js': minify_js, 'css': minify_css, 'html': minify_html}
+
+# --- Grafo de referencias -----------------------------------------------------------------------
+
+
+def _split_url(url):
+    """(ruta, sufijo con ?query/#fragmento sin el ?v= de cache busting)."""
+    path, sep, fragment = url.partition('#')
+    path, has_query, query = path.partition('?')
+    query = _CACHE_BUST.sub('', query).lstrip('&') if has_query else ''
+    suffix = f'?{query}' if query else ''
+    return path, suffix + (f'#{fragment}' if sep else '')
+
+
+def _resolve_ref(relative_path, url, files):
+    """Archivo del proyecto al que apunta url desde relative_path, o None (externo, absoluto o inexistente)."""
+    if _EXTERNAL_URL.match(url) or url.startswith('/'):
+        return None
+    path = unquote(_split_url(url)[0])
+    if not path:
+        return None
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(relative_path), path))
+    return target if target in files else None
+
+
+def _iter_refs(kind, text):
+    """(match, grupo de la URL) de cada referencia del texto."""
+    for pattern in _REF_PATTERNS.get(kind, ()):
+        for m in pattern.finditer(text):
+            group = 'url' if m.group('url') is not None else 'url2'
+            yield m, group
+
+
+def _find_deps(relative_path, kind, text, files):
+    deps = set()
+    for m, group in _iter_refs(kind, text):
+        target = _resolve_ref(relative_path, m.group(group), files)
+        if target and target != relative_path:
+            deps.add(target)
+    return sorted(deps)
+
+
+def _rewrite_refs(relative_path, kind, text, files, names):
+    """Reescribe las referencias locales de text a los nombres publicados (names: original -> salida)."""
+    base = posixpath.dirname(relative_path)
+    for pattern in _REF_PATTERNS.get(kind, ()):
+        def replace(m):
+            group = 'url' if m.group('url') is not None else 'url2'
+            url = m.group(group)
+            target = _resolve_ref(relative_path, url, files)
+            if target is None:
+                return m.group(0)
+            new_url = posixpath.relpath(names[target], base or '.')
+            if kind in ('js', 'html') and pattern is _JS_REF and not new_url.startswith('.'):
+                new_url = f'./{new_url}'  # los especificadores relativos de ES modules necesitan ./
+            new_url += _split_url(url)[1]
+            start, end = m.start(group) - m.start(), m.end(group) - m.start()
+            return f'{m.group(0)[:start]}{new_url}{m.group(0)[end:]}'
+        text = pattern.sub(replace, text)
+    return text
+
+
+def _strongly_connected(graph):
+    """Componentes fuertemente conexas (Tarjan iterativo), con las dependencias antes que quien las usa."""
+    index, lowlink, on_stack = {}, {}, set()
+    stack, components = [], []
+    counter = 0
+    for root in sorted(graph):
+        if root in index:
+            continue
+        work = [(root, iter(graph[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+    return components
+
+
+def _hashed_name(relative_path, digest):
+    directory, filename = posixpath.split(relative_path)
+    stem, ext = posixpath.splitext(filename)
+    return posixpath.join(directory, f'{stem}.{digest}{ext}')
+
+
+# --- Exportación --------------------------------------------------------------------------------
+
+
+def _default_projects_dir():
+    script_dir = Path(__file__).parent.resolve()
+    common_dir = script_dir.parent.parent.resolve()
+    return common_dir.parent
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@profiling.PROFILER.timed('write')
+def _write_atomic(path, data):
+    """Reemplazo atómico: quien sirva el directorio ve el archivo viejo o el nuevo, nunca uno a medias."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_if_changed(path, data):
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    _write_atomic(path, data)
+    return True
+
+
+def _version_payload(path, digest):
+    """version.json como el de update-version: v entero (ms) que solo cambia con el digest, y el digest en hash."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    v = previous.get('v') if isinstance(previous, dict) else None
+    if not isinstance(v, int) or previous.get('hash') != digest:
+        v = max(int(time.time() * 1000), v + 1 if isinstance(v, int) else 0)
+    return {'hash': digest, 'v': v}
+
+
+def _gzip_bytes(data):
+    # mtime=0: la misma entrada da el mismo .gz (despliegues reproducibles)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+@profiling.PROFILER.timed('discovery')
+def _collect_files(project_root, output_root):
+    """Rutas relativas (posix) de los archivos publicables del proyecto.
+
+    Se saltan la salida actual y la por defecto: un export anterior no se vuelve a exportar."""
+    files = []
+    outputs = {output_root, project_root / DEFAULT_OUTPUT}
+    for dirpath, dirnames, filenames in os.walk(project_root):
+        current = Path(dirpath)
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in IGNORE_DIRS and not d.startswith('.') and current / d not in outputs)
+        for filename in sorted(filenames):
+            if (filename.startswith('.') or filename in IGNORE_FILES
+                    or os.path.splitext(filename)[1].lower() not in PUBLISHED_EXTENSIONS):
+                continue
+            files.append((current / filename).relative_to(project_root).as_posix())
+    return files
+
+
+def _cache_path(project_root, output_root):
+    """Caché del export de project_root hacia output_root (una por directorio de salida)."""
+    name = CACHE_NAME
+    if output_root != project_root / DEFAULT_OUTPUT:
+        name = 'export-static-%s.json' % _sha256(str(output_root).encode('utf-8'))[:HASH_LENGTH]
+    return project_root / CACHE_DIR / name
+
+
+def _load_cache(cache_path, output_root, minify, compress):
+    """(entradas de la exportación anterior, si se pueden reutilizar con este formato y opciones).
+
+    Aunque no se reutilicen, sus salidas sirven para borrar las que ya no corresponden."""
+    for path in (cache_path, output_root / LEGACY_CACHE_NAME):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            break
+        except (OSError, ValueError):
+            continue
+    else:
+        return {}, False
+    reusable = cache.get('format') == EXPORT_FORMAT and cache.get('minify') == minify and cache.get('gzip') == compress
+    return cache.get('files', {}), reusable
+
+
+@profiling.PROFILER.timed('scan')
+def _scan(project_root, files, previous):
+    """Hash de entrada y dependencias por archivo; los que no cambiaron (mtime y tamaño) no se leen."""
+    scanned = {}
+    file_set = set(files)
+    # Un archivo nuevo puede resolver referencias que antes no apuntaban a nada: se reanaliza el texto
+    added = bool(file_set - set(previous))
+    read = 0
+    for relative_path in files:
+        st = os.stat(project_root / relative_path)
+        kind = KIND_BY_EXTENSION.get(posixpath.splitext(relative_path)[1].lower())
+        entry = previous.get(relative_path)
+        if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size \
+                and all(dep in file_set for dep in entry['deps']) and not (added and kind):
+            scanned[relative_path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                                      'input': entry['input'], 'deps': entry['deps']}
+            continue
+        data = (project_root / relative_path).read_bytes()
+        read += 1
+        deps = []
+        if kind:
+            try:
+                deps = _find_deps(relative_path, kind, data.decode('utf-8'), file_set)
+            except UnicodeDecodeError:
+                pass
+        scanned[relative_path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                                  'input': _sha256(data), 'deps': deps}
+    return scanned, read
+
+
+def _plan_names(scanned, minify):
+    """Hash de salida y nombre publicado de cada archivo.
+
+    El hash depende del contenido y de los nombres publicados de sus dependencias, así un cambio en
+    un módulo cambia también el nombre de quien lo importa. Los ciclos (módulos que se importan entre
+    sí) comparten un hash de componente calculado con todos sus miembros.
+    """
+    graph = {path: entry['deps'] for path, entry in scanned.items()}
+    names, digests = {}, {}
+    for component in _strongly_connected(graph):
+        members = set(component)
+        outside = sorted({(dep, names[dep]) for path in component for dep in graph[path] if dep not in members})
+        group = _sha256(json.dumps([[scanned[p]['input'] for p in component], outside]).encode('utf-8'))
+        for path in component:
+            payload = json.dumps([EXPORT_FORMAT, minify, path, scanned[path]['input'], group])
+            digest = _sha256(payload.encode('utf-8'))[:HASH_LENGTH]
+            digests[path] = digest
+            filename = posixpath.basename(path)
+            ext = posixpath.splitext(filename)[1].lower()
+            hashed = ext in HASHED_EXTENSIONS and filename not in STABLE_NAMES
+            names[path] = _hashed_name(path, digest) if hashed else path
+    return names, digests
+
+
+@profiling.PROFILER.timed('render')
+def _render(project_root, relative_path, file_set, names, minify):
+    """Bytes publicados de un archivo: minificado y con las referencias reescritas."""
+    data = (project_root / relative_path).read_bytes()
+    kind = KIND_BY_EXTENSION.get(posixpath.splitext(relative_path)[1].lower())
+    if kind is None:
+        return data
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data
+    if minify and kind in _MINIFIERS:
+        text = _MINIFIERS[kind](text)
+    return _rewrite_refs(relative_path, kind, text, file_set, names).encode('utf-8')
+
+
+def _outputs_for(relative_path, name, size, compress):
+    outputs = [relative_path] if name == relative_path else [relative_path, name]
+    if compress and posixpath.splitext(relative_path)[1].lower() in GZIP_EXTENSIONS and size >= GZIP_MIN_SIZE:
+        outputs += [f'{output}.gz' for output in outputs]
+    return outputs
+
+
+def export_project(project_root, output_root=None, minify=True, compress=True):
+    """Exporta un proyecto. Devuelve un dict con el resumen (archivos, reconstruidos, reutilizados, ...)."""
+    started = time.perf_counter()
+    project_root = Path(project_root).resolve()
+    output_root = Path(output_root).resolve() if output_root else project_root / DEFAULT_OUTPUT
+    cache_path = _cache_path(project_root, output_root)
+    previous, reusable = _load_cache(cache_path, output_root, minify, compress)
+    files = _collect_files(project_root, output_root)
+    file_set = set(files)
+    scanned, read = _scan(project_root, files, previous if reusable else {})
+    names, digests = _plan_names(scanned, minify)
+
+    rebuilt, reused = [], 0
+    cache = {}
+    for relative_path in files:
+        entry = dict(scanned[relative_path], digest=digests[relative_path], name=names[relative_path])
+        old = previous.get(relative_path) if reusable else None
+        if old and old.get('digest') == entry['digest'] and old.get('name') == entry['name'] \
+                and all((output_root / output).is_file() for output in old['outputs']):
+            entry['outputs'], entry['output_size'] = old['outputs'], old['output_size']
+            cache[relative_path] = entry
+            reused += 1
+            continue
+        data = _render(project_root, relative_path, file_set, names, minify)
+        outputs = _outputs_for(relative_path, entry['name'], len(data), compress)
+        compressed = _gzip_bytes(data) if any(o.endswith('.gz') for o in outputs) else None
+        for output in outputs:
+            _write_if_changed(output_root / output, compressed if output.endswith('.gz') else data)
+        entry['outputs'], entry['output_size'] = outputs, len(data)
+        cache[relative_path] = entry
+        rebuilt.append(relative_path)
+
+    # Salidas de archivos borrados o de versiones anteriores (otro hash)
+    current_outputs = {output for entry in cache.values() for output in entry['outputs']}
+    removed = 0
+    for old in previous.values():
+        for output in old.get('outputs', ()):
+            if output not in current_outputs:
+                try:
+                    (output_root / output).unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+
+    assets = {path: names[path] for path in files if names[path] != path}
+    version = _sha256(json.dumps(sorted(digests.items())).encode('utf-8'))[:HASH_LENGTH + 2]
+    entries = [{'url': names[path], 'revision': digests[path]} for path in files
+               if posixpath.basename(path) != 'service-worker.js']
+    manifests = {
+        ASSET_MANIFEST_NAME: {'version': version, 'files': assets},
+        PRECACHE_MANIFEST_NAME: {'version': version, 'entries': entries},
+        VERSION_NAME: _version_payload(output_root / VERSION_NAME, version),
+    }
+    output_root.mkdir(parents=True, exist_ok=True)
+    for name, payload in manifests.items():
+        indent = None if name == VERSION_NAME else 2
+        _write_if_changed(output_root / name, (json.dumps(payload, indent=indent, sort_keys=True) + '\n').encode('utf-8'))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {'format': EXPORT_FORMAT, 'minify': minify, 'gzip': compress, 'files': cache}
+    _write_if_changed(cache_path, (json.dumps(payload, sort_keys=True) + '\n').encode('utf-8'))
+    try:
+        (output_root / LEGACY_CACHE_NAME).unlink()
+    except FileNotFoundError:
+        pass
+
+    return {
+        'project': project_root.name,
+        'output': str(output_root),
+        'version': version,
+        'files': len(files),
+        'read': read,
+        'rebuilt': rebuilt,
+        'reused': reused,
+        'removed': removed,
+        'input_bytes': sum(entry['size'] for entry in cache.values()),
+        'output_bytes': sum(entry['output_size'] for entry in cache.values()),
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+    }
+
+
+def _export_task(args):
+    project_root, output_root, minify, compress = args
+    try:
+        result = export_project(project_root, output_root, minify, compress)
+    except (OSError, ValueError) as e:
+        result = {'project': Path(project_root).name, 'error': str(e)}
+    # Fases medidas en el worker, para sumarlas en el proceso principal
+    result['profile'] = profiling.PROFILER.drain() if profiling.PROFILER.enabled else None
+    return result
+
+
+def export_projects(project_names=None, projects_dir=None, output_dir=None, minify=True, compress=True,
+                    max_workers=None):
+    """Exporta varios proyectos en paralelo (procesos: minificar es CPU). Devuelve {proyecto: resumen}.
+
+    Sin project_names exporta todos los nrd-* con index.html. Con output_dir cada proyecto va a
+    output_dir/<proyecto>; si no, a <proyecto>/dist/static.
+    """
+    projects_dir = Path(projects_dir) if projects_dir is not None else _default_projects_dir()
+    if project_names is None:
+        project_names = sorted(p.name for p in projects_dir.glob('nrd-*') if (p / 'index.html').is_file())
+    if not project_names:
+        return {}
+    tasks = [(projects_dir / name, Path(output_dir) / name if output_dir else None, minify, compress)
+             for name in project_names]
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+    if max_workers == 1:
+        results = [_export_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_export_task, tasks))
+    for result in results:
+        profiling.PROFILER.merge(result.pop('profile'))
+    return {result['project']: result for result in results}
+
+
+def _format_size(size):
+    return f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / (1024 * 1024):.1f} MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta proyectos NRD como sitio estático de producción")
+    parser.add_argument('projects', nargs='*', metavar='proyecto',
+                        help="proyectos (por defecto, el del directorio actual)")
+    parser.add_argument('--all', action='store_true', help="todos los proyectos nrd-* con index.html")
+    parser.add_argument('--output', metavar='DIR',
+                        help=f"directorio raíz de salida (DIR/<proyecto>; por defecto <proyecto>/{DEFAULT_OUTPUT})")
+    parser.add_argument('--no-minify', action='store_true', help="copiar JS/CSS/HTML sin minificar")
+    parser.add_argument('--no-gzip', action='store_true', help="no escribir los hermanos .gz")
+    parser.add_argument('--jobs', type=int, metavar='N', help="procesos en paralelo (por defecto, uno por CPU)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = profiling.configure_from_args(args, 'export-static')
+
+    started = time.perf_counter()
+    projects_dir = _default_projects_dir()
+    if args.all:
+        project_names = None
+    elif args.projects:
+        project_names = args.projects
+    else:
+        current_dir = Path.cwd()
+        if 'nrd-' not in current_dir.name or not (current_dir / 'index.html').is_file():
+            print("❌ Error: No se especificó el proyecto y no se puede detectar automáticamente")
+            print("   Uso: python3 export-static.py [proyecto ...] [--all]")
+            return 1
+        projects_dir, project_names = current_dir.parent, [current_dir.name]
+
+    missing = [name for name in project_names or () if not (projects_dir / name / 'index.html').is_file()]
+    for name in missing:
+        print(f"❌ Error: {projects_dir / name / 'index.html'} no encontrado")
+    if project_names is not None:
+        project_names = [name for name in project_names if name not in missing]
+
+    results = export_projects(project_names, projects_dir, args.output, not args.no_minify,
+                              not args.no_gzip, args.jobs)
+    failed = bool(missing)
+    for name, result in results.items():
+        if 'error' in result:
+            failed = True
+            print(f"❌ {name}: {result['error']}")
+            continue
+        rebuilt = len(result['rebuilt'])
+        status = f"{rebuilt} reconstruido(s), {result['reused']} reutilizado(s)" if rebuilt else "sin cambios"
+        print(f"📦 {name}: {result['files']} archivos ({status}) "
+              f"{_format_size(result['input_bytes'])} → {_format_size(result['output_bytes'])} "
+              f"en {result['elapsed_ms']:.0f} ms")
+        print(f"   → {result['output']} (versión {result['version']})")
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print()
+    print(f"✨ Exportación completada ({len(results)} proyecto(s) en {elapsed_ms:.0f} ms)")
+    profiler.report()
+    return 1 if failed or not results else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,13 +6,47 @@ Uso: python3 generate-icon.py "TEXTO_DEL_ICONO" [directorio_salida] [icon_type]
 Ejemplo: python3 generate-icon.py "NRD Catálogo" assets/icons
 Ejemplo bakery: python3 generate-icon.py "Panadería|Nueva Río D'or" assets/icons bakery
 Icon types: catalog (default), bakery
+Lote: python3 generate-icon.py --batch iconos.json [--workers N]
+  iconos.json: [{"text": "NRD Catálogo", "icon_type": "catalog", "sizes": [192, 512],
+                 "output_dir": "../nrd-catalogo/assets/icons"}, ...]
+  Los SVG se rasterizan en memoria y los trabajos se reparten en un pool de procesos.
+Caché de renders: ~/.cache/nrd-icons (o NRD_ICON_CACHE_DIR), por hash del SVG y tamaño;
+los iconos sin cambios se copian desde ahí sin ejecutar cairo. --no-cache la desactiva.
+Set PWA: python3 generate-icon.py "TEXTO" assets/icons [icon_type] --pwa
+  Rasteriza una sola vez a 1024 px y deriva con Pillow los tamaños de 48 a 1024, las variantes
+  maskable, apple-touch-icon.png, favicon.ico y manifest-icons.json (entrada "icons" del manifest).
+--profile (o NRD_PROFILE=1) imprime los tiempos por fase (svg, render de cairo, resize, encode, write),
+sumando los de los workers del pool en --batch.
 """
 
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 ICON_CATALOG = "catalog"
 ICON_BAKERY = "bakery"
+DEFAULT_SIZES = (192, 512)
+PWA_MASTER_SIZE = 1024
+PWA_SIZES = (48, 72, 96, 128, 144, 152, 192, 256, 384, 512, 1024)
+PWA_MASKABLE_SIZES = (192, 512)
+# Zona segura de los iconos maskable: el contenido ocupa el 80% central, el resto es fondo
+PWA_MASKABLE_SAFE_ZONE = 0.8
+PWA_MASKABLE_BACKGROUND = (220, 38, 38, 255)  # #dc2626, rojo NRD
+APPLE_TOUCH_SIZE = 180
+FAVICON_SIZES = (16, 32, 48)
+# Tamaño máximo de la caché de renders (los más antiguos se borran primero)
+ICON_CACHE_MAX_BYTES = int(os.environ.get('NRD_ICON_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+
+# Instrumentación compartida (tools/profiling/nrd_profiling.py): un solo profiler por proceso
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'profiling'))
+import nrd_profiling as profiling
 
 
 def escape_xml(text):
@@ -109,6 +143,7 @@ def get_catalog_icon_svg(size, icon_y, icon_size, icon_spacing, stroke_width):
   </g>'''
 
 
+@profiling.PROFILER.timed('svg')
 def generate_svg(text, size, icon_type=ICON_CATALOG):
     """Genera el código SVG para un icono con el texto proporcionado"""
     line1, line2 = split_text(text)
@@ -211,75 +246,369 @@ def generate_svg(text, size, icon_type=ICON_CATALOG):
     return svg
 
 
-def convert_svg_to_png_from_file(svg_path, png_path, size):
-    """Convierte un archivo SVG a PNG"""
+def layout_size_for(size):
+    """generate_svg tiene el layout ajustado para 192 y 512; el resto de tamaños escala el más cercano."""
+    return 192 if size <= 192 else 512
+
+
+_cairosvg = None
+
+
+def _load_cairosvg(quiet=False):
+    """Importa cairosvg una sola vez por proceso. Devuelve None (e imprime el error) si no está instalado."""
+    global _cairosvg
+    if _cairosvg is None:
+        try:
+            import cairosvg
+        except ImportError:
+            if not quiet:
+                print("✗ Error: cairosvg no está instalado. Ejecuta: pip install cairosvg")
+            return None
+        except OSError as e:
+            # cairosvg instalado pero sin la librería nativa (libcairo)
+            if not quiet:
+                print(f"✗ Error: cairosvg no puede cargar cairo: {e}")
+            return None
+        _cairosvg = cairosvg
+    return _cairosvg
+
+
+@profiling.PROFILER.timed('render')
+def render_png(svg, size):
+    """Rasteriza el SVG (str) en memoria y devuelve los bytes del PNG de size x size."""
+    cairosvg = _load_cairosvg(quiet=True)
+    if cairosvg is None:
+        raise RuntimeError("cairosvg no está disponible. Ejecuta: pip install cairosvg")
+    return cairosvg.svg2png(
+        bytestring=svg.encode('utf-8'),
+        output_width=size,
+        output_height=size
+    )
+
+
+def default_cache_dir():
+    """Caché de renders compartida por todas las copias de la herramienta (sync-common copia tools/ a cada proyecto)."""
+    if os.environ.get('NRD_ICON_CACHE_DIR'):
+        return Path(os.environ['NRD_ICON_CACHE_DIR'])
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'nrd-icons'
+
+
+def cache_key(svg, size):
+    """Clave del render: hash del SVG generado y del tamaño de salida (cambiar texto, tipo o layout la invalida)."""
+    digest = hashlib.sha256(svg.encode('utf-8'))
+    digest.update(f'\0{size}'.encode('ascii'))
+    return digest.hexdigest()
+
+
+@profiling.PROFILER.timed('write')
+def _atomic_write(path, data):
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+@profiling.PROFILER.timed('cache')
+def _place_from_cache(cached_path, png_path):
+    """Deja en png_path una copia del PNG de la caché.
+
+    Copia y no hard link: la evicción usa el mtime de la entrada como marca de uso (os.utime),
+    y con un inodo compartido eso cambiaría también el mtime del icono del proyecto."""
+    tmp_path = png_path.with_name(f'.{png_path.name}.{os.getpid()}.tmp')
+    shutil.copyfile(cached_path, tmp_path)
+    os.replace(tmp_path, png_path)
+
+
+def render_icon(svg, size, png_path, cache_dir=None):
+    """Genera png_path a partir del SVG. Con cache_dir, reutiliza el render si ya existe.
+
+    Devuelve True si salió de la caché (sin ejecutar cairo)."""
+    png_path = Path(png_path)
+    if cache_dir is None:
+        _atomic_write(png_path, render_png(svg, size))
+        return False
+    cached_path = Path(cache_dir) / f'{cache_key(svg, size)}.png'
+    if cached_path.exists():
+        try:
+            os.utime(cached_path)  # marca de uso para la evicción (LRU por mtime)
+            _place_from_cache(cached_path, png_path)
+            return True
+        except OSError:
+            pass  # entrada borrada por otra evicción en paralelo: se vuelve a renderizar
+    data = render_png(svg, size)
+    try:
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(cached_path, data)
+        _place_from_cache(cached_path, png_path)
+    except OSError:
+        _atomic_write(png_path, data)  # caché no escribible: se genera igual
+    return False
+
+
+def render_png_cached(svg, size, cache_dir=None):
+    """Como render_png, pero pasando por la caché de renders. Devuelve (bytes del PNG, salió de la caché)."""
+    if cache_dir is None:
+        return render_png(svg, size), False
+    cached_path = Path(cache_dir) / f'{cache_key(svg, size)}.png'
     try:
-        import cairosvg
-
-        cairosvg.svg2png(
-            url=str(svg_path),
-            write_to=str(png_path),
-            output_width=size,
-            output_height=size
-        )
-        print(f"✓ Generado {png_path.name} ({size}x{size})")
+        data = cached_path.read_bytes()
+        os.utime(cached_path)
+        return data, True
+    except OSError:
+        pass
+    data = render_png(svg, size)
+    try:
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(cached_path, data)
+    except OSError:
+        pass
+    return data, False
+
+
+@profiling.PROFILER.timed('evict')
+def evict_cache(cache_dir, max_bytes):
+    """Borra los renders usados hace más tiempo hasta que la caché ocupe como mucho max_bytes."""
+    try:
+        entries = [(entry.stat(), entry) for entry in Path(cache_dir).glob('*.png')]
+    except OSError:
+        return
+    total = sum(st.st_size for st, _ in entries)
+    for st, entry in sorted(entries, key=lambda item: item[0].st_mtime):
+        if total <= max_bytes:
+            break
+        try:
+            entry.unlink()
+            total -= st.st_size
+        except OSError:
+            pass
+
+
+def convert_svg_to_png(svg, png_path, size, cache_dir=None):
+    """Convierte el código SVG a un archivo PNG"""
+    try:
+        cached = render_icon(svg, size, png_path, cache_dir)
+        print(f"✓ Generado {png_path.name} ({size}x{size}){' (caché)' if cached else ''}")
         return True
-    except ImportError:
-        print("✗ Error: cairosvg no está instalado. Ejecuta: pip install cairosvg")
+    except RuntimeError:
+        _load_cairosvg()  # imprime el motivo (no instalado o sin libcairo)
         return False
     except Exception as e:
         print(f"✗ Error al convertir a PNG: {e}")
         return False
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("✗ Error: Debes proporcionar el texto del icono")
-        print("   Uso: python3 generate-icon.py \"TEXTO_DEL_ICONO\" [directorio_salida] [icon_type]")
-        print("   Ejemplo: python3 generate-icon.py \"NRD Catálogo\" assets/icons")
-        print("   Ejemplo bakery: python3 generate-icon.py \"Panadería|Nueva Río D'or\" assets/icons bakery")
-        return 1
+def _load_pillow():
+    """Importa Pillow (solo lo necesita --pwa). Devuelve el módulo Image o None (e imprime el error)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("✗ Error: Pillow no está instalado. Ejecuta: pip install pillow")
+        return None
+    return Image
+
+
+def _save_image(image, path, **params):
+    buffer = io.BytesIO()
+    with profiling.phase('encode'):
+        image.save(buffer, **params)
+    _atomic_write(path, buffer.getvalue())
+
 
-    icon_text = sys.argv[1]
-    output_dir = Path(sys.argv[2]).resolve() if len(sys.argv) > 2 else Path.cwd()
-    icon_type = (sys.argv[3] or ICON_CATALOG).lower() if len(sys.argv) > 3 else ICON_CATALOG
-    if icon_type not in (ICON_CATALOG, ICON_BAKERY):
-        icon_type = ICON_CATALOG
+def generate_pwa_icons(icon_text, output_dir, icon_type=ICON_CATALOG, cache_dir=None, url_prefix=''):
+    """Genera el set completo de iconos PWA a partir de un único render a PWA_MASTER_SIZE.
 
-    if not output_dir.exists():
+    El resto de tamaños se reduce desde ese master con Lanczos, así el set cuesta un solo render.
+    Devuelve True si todo se generó."""
+    Image = _load_pillow()
+    if Image is None:
+        return False
+    lanczos = getattr(Image, 'Resampling', Image).LANCZOS
+
+    svg = generate_svg(icon_text, layout_size_for(PWA_MASTER_SIZE), icon_type)
+    try:
+        data, cached = render_png_cached(svg, PWA_MASTER_SIZE, cache_dir)
+    except RuntimeError:
+        _load_cairosvg()  # imprime el motivo (no instalado o sin libcairo)
+        return False
+    except Exception as e:
+        print(f"✗ Error al convertir a PNG: {e}")
+        return False
+    print(f"✓ Render master {PWA_MASTER_SIZE}x{PWA_MASTER_SIZE}{' (caché)' if cached else ''}")
+    master = Image.open(io.BytesIO(data)).convert('RGBA')
+
+    def resized(image, size):
+        if image.size == (size, size):
+            return image
+        with profiling.phase('resize'):
+            return image.resize((size, size), lanczos)
+
+    # Maskable: a sangre, con el icono dentro de la zona segura (el launcher recorta el resto)
+    inner = round(PWA_MASTER_SIZE * PWA_MASKABLE_SAFE_ZONE)
+    offset = (PWA_MASTER_SIZE - inner) // 2
+    maskable = Image.new('RGBA', master.size, PWA_MASKABLE_BACKGROUND)
+    maskable.alpha_composite(resized(master, inner), (offset, offset))
+
+    icons = []
+    for size in PWA_SIZES:
+        name = f"icon-{size}.png"
+        _save_image(resized(master, size), output_dir / name, format='PNG')
+        icons.append({'src': f'{url_prefix}{name}', 'sizes': f'{size}x{size}', 'type': 'image/png', 'purpose': 'any'})
+        print(f"✓ Generado {name} ({size}x{size})")
+    for size in PWA_MASKABLE_SIZES:
+        name = f"icon-maskable-{size}.png"
+        _save_image(resized(maskable, size), output_dir / name, format='PNG')
+        icons.append({'src': f'{url_prefix}{name}', 'sizes': f'{size}x{size}', 'type': 'image/png', 'purpose': 'maskable'})
+        print(f"✓ Generado {name} ({size}x{size}, maskable)")
+
+    # iOS no respeta la transparencia (esquinas negras): el apple-touch-icon sale del maskable, opaco
+    _save_image(resized(maskable, APPLE_TOUCH_SIZE).convert('RGB'), output_dir / 'apple-touch-icon.png', format='PNG')
+    print(f"✓ Generado apple-touch-icon.png ({APPLE_TOUCH_SIZE}x{APPLE_TOUCH_SIZE})")
+    _save_image(master, output_dir / 'favicon.ico', format='ICO', sizes=[(s, s) for s in FAVICON_SIZES])
+    print(f"✓ Generado favicon.ico ({', '.join(str(s) for s in FAVICON_SIZES)} px)")
+
+    manifest_icons = json.dumps({'icons': icons}, indent=2, ensure_ascii=False) + '\n'
+    _atomic_write(output_dir / 'manifest-icons.json', manifest_icons.encode('utf-8'))
+    print("✓ Generado manifest-icons.json (copiar \"icons\" al manifest de la app)")
+    return True
+
+
+def _icon_url_prefix(output_dir):
+    """Prefijo de las URLs del manifest: la ruta de salida relativa al directorio actual (raíz del proyecto)."""
+    try:
+        relative = output_dir.relative_to(Path.cwd()).as_posix()
+    except ValueError:
+        return ''
+    return '' if relative == '.' else f'{relative}/'
+
+
+def _render_job(task):
+    """Tarea de un worker del pool: (texto, icon_type, tamaño, ruta PNG, caché) ->
+    (ruta, de caché, error o None, fases medidas en el worker para sumarlas en el proceso principal)."""
+    text, icon_type, size, png_path, cache_dir = task
+    try:
+        svg = generate_svg(text, layout_size_for(size), icon_type)
+        cached, error = render_icon(svg, size, png_path, cache_dir), None
+    except Exception as e:
+        cached, error = False, str(e)
+    return png_path, cached, error, profiling.PROFILER.drain() if profiling.PROFILER.enabled else None
+
+
+def load_batch_spec(spec_path, cache_dir=None):
+    """Lee el archivo de trabajos (JSON): lista de {text, icon_type, sizes, output_dir}, o {"jobs": [...]}.
+
+    output_dir relativo se resuelve respecto al directorio del archivo de especificación.
+    """
+    spec_path = Path(spec_path).resolve()
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    jobs = spec.get('jobs', []) if isinstance(spec, dict) else spec
+    tasks = []
+    for job in jobs:
+        text = job['text']
+        icon_type = (job.get('icon_type') or ICON_CATALOG).lower()
+        if icon_type not in (ICON_CATALOG, ICON_BAKERY):
+            icon_type = ICON_CATALOG
+        output_dir = spec_path.parent / job.get('output_dir', '.')
         output_dir.mkdir(parents=True, exist_ok=True)
+        for size in job.get('sizes', DEFAULT_SIZES):
+            png_path = str(output_dir.resolve() / f"icon-{int(size)}.png")
+            tasks.append((text, icon_type, int(size), png_path, str(cache_dir) if cache_dir else None))
+    return tasks
+
 
-    print(f"Generando iconos con texto: \"{icon_text}\" (icon_type={icon_type})")
-    print(f"Directorio de salida: {output_dir}")
-    print()
+def run_batch(tasks, workers=None):
+    """Rasteriza todas las tareas repartidas en un pool de procesos. Devuelve la cantidad de errores."""
+    if not tasks:
+        print("✗ Error: el archivo de trabajos no tiene iconos para generar")
+        return 1
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    print(f"Generando {len(tasks)} iconos con {workers} proceso(s)...")
+    if workers == 1:
+        results = map(_render_job, tasks)
+    else:
+        # Cada worker importa cairosvg una sola vez (initializer) y procesa varios iconos
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_load_cairosvg, initargs=(True,))
+        results = pool.map(_render_job, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+    errors = 0
+    try:
+        for task, (png_path, cached, error, phases) in zip(tasks, results):
+            profiling.PROFILER.merge(phases)
+            size = task[2]
+            if error:
+                errors += 1
+                print(f"✗ Error al convertir {png_path}: {error}")
+            else:
+                print(f"✓ Generado {png_path} ({size}x{size}){' (caché)' if cached else ''}")
+    finally:
+        if workers > 1:
+            pool.shutdown()
+    return errors
 
-    import tempfile
-    temp_dir = Path(tempfile.mkdtemp())
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Genera iconos PNG con texto sobre fondo rojo NRD",
+        epilog="Ejemplo: python3 generate-icon.py \"NRD Catálogo\" assets/icons")
+    parser.add_argument('text', nargs='?', help="texto del icono (| separa las dos líneas)")
+    parser.add_argument('output_dir', nargs='?', help="directorio de salida (por defecto, el actual)")
+    parser.add_argument('icon_type', nargs='?', default=ICON_CATALOG, help="catalog (por defecto) o bakery")
+    parser.add_argument('--batch', metavar='SPEC',
+                        help="archivo JSON con trabajos {text, icon_type, sizes, output_dir}")
+    parser.add_argument('--workers', type=int, help="procesos para --batch (por defecto, uno por CPU)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="renderizar siempre, sin leer ni escribir la caché de renders")
+    parser.add_argument('--pwa', action='store_true',
+                        help="set PWA completo (48-1024, maskable, apple-touch-icon, favicon.ico) desde un solo render")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    profiler = profiling.configure_from_args(args, 'generate-icon')
+    cache_dir = None if args.no_cache else default_cache_dir()
 
     try:
-        svg_192_content = generate_svg(icon_text, 192, icon_type)
-        svg_192_path = temp_dir / "icon-192.svg"
-        with open(svg_192_path, 'w') as f:
-            f.write(svg_192_content)
-
-        svg_512_content = generate_svg(icon_text, 512, icon_type)
-        svg_512_path = temp_dir / "icon-512.svg"
-        with open(svg_512_path, 'w') as f:
-            f.write(svg_512_content)
-
-        png_192_path = output_dir / "icon-192.png"
-        if not convert_svg_to_png_from_file(svg_192_path, png_192_path, 192):
+        if args.batch:
+            try:
+                tasks = load_batch_spec(args.batch, cache_dir)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"✗ Error: no se pudo leer {args.batch}: {e}")
+                return 1
+            return 1 if run_batch(tasks, args.workers) else 0
+
+        if not args.text:
+            print("✗ Error: Debes proporcionar el texto del icono")
+            print("   Uso: python3 generate-icon.py \"TEXTO_DEL_ICONO\" [directorio_salida] [icon_type]")
+            print("   Ejemplo: python3 generate-icon.py \"NRD Catálogo\" assets/icons")
+            print("   Ejemplo bakery: python3 generate-icon.py \"Panadería|Nueva Río D'or\" assets/icons bakery")
+            print("   Lote: python3 generate-icon.py --batch iconos.json")
             return 1
 
-        png_512_path = output_dir / "icon-512.png"
-        if not convert_svg_to_png_from_file(svg_512_path, png_512_path, 512):
-            return 1
+        icon_text = args.text
+        output_dir = Path(args.output_dir).resolve() if args.output_dir else Path.cwd()
+        icon_type = (args.icon_type or ICON_CATALOG).lower()
+        if icon_type not in (ICON_CATALOG, ICON_BAKERY):
+            icon_type = ICON_CATALOG
 
-    finally:
-        import shutil
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        if not output_dir.exists():
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+        print(f"Generando iconos con texto: \"{icon_text}\" (icon_type={icon_type})")
+        print(f"Directorio de salida: {output_dir}")
+        print()
 
-    return 0
+        if args.pwa:
+            ok = generate_pwa_icons(icon_text, output_dir, icon_type, cache_dir, _icon_url_prefix(output_dir))
+            return 0 if ok else 1
+
+        for size in DEFAULT_SIZES:
+            svg_content = generate_svg(icon_text, size, icon_type)
+            if not convert_svg_to_png(svg_content, output_dir / f"icon-{size}.png", size, cache_dir):
+                return 1
+
+        return 0
+    finally:
+        if cache_dir is not None:
+            evict_cache(cache_dir, ICON_CACHE_MAX_BYTES)
+        profiler.report()
 
 
 if __name__ == "__main__":
@@ -3,9 +3,16 @@
 # Uso: ./generate-icon.sh "TEXTO_DEL_ICONO" [directorio_salida] [icon_type]
 # Ejemplo desde nrd-catalogo: ../../nrd-common/tools/generate-icons/generate-icon.sh "NRD Catálogo" assets/icons
 # Ejemplo bakery: ../../nrd-common/tools/generate-icons/generate-icon.sh "Panadería|Nueva Río D'or" assets/icons bakery
+# Lote: ./generate-icon.sh --batch iconos.json [--workers N]  (ver generate-icon.py)
+# Set PWA: ./generate-icon.sh "TEXTO_DEL_ICONO" assets/icons [icon_type] --pwa
 
 set -e
 
+BATCH_MODE=false
+if [ "$1" = "--batch" ]; then
+    BATCH_MODE=true
+fi
+
 if [ -z "$1" ]; then
     echo "✗ Error: Debes proporcionar el texto del icono como parámetro"
     echo "   Uso: ./generate-icon.sh \"TEXTO_DEL_ICONO\" [directorio_salida] [icon_type]"
@@ -20,16 +27,18 @@ ICON_TYPE="${3:-catalog}"
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 COMMON_DIR="$(cd "$SCRIPT_DIR/../.." && pwd)"
 
-echo "Generando icono con texto: \"$ICON_TEXT\""
-echo "Directorio de salida: $OUTPUT_DIR"
-echo ""
+if [ "$BATCH_MODE" = false ]; then
+    echo "Generando icono con texto: \"$ICON_TEXT\""
+    echo "Directorio de salida: $OUTPUT_DIR"
+    echo ""
 
-# Resolver ruta de salida respecto al directorio actual
-if [[ "$OUTPUT_DIR" != /* ]]; then
-    OUTPUT_DIR="$(pwd)/$OUTPUT_DIR"
+    # Resolver ruta de salida respecto al directorio actual
+    if [[ "$OUTPUT_DIR" != /* ]]; then
+        OUTPUT_DIR="$(pwd)/$OUTPUT_DIR"
+    fi
+    mkdir -p "$OUTPUT_DIR"
+    OUTPUT_DIR="$(cd "$OUTPUT_DIR" && pwd)"
 fi
-mkdir -p "$OUTPUT_DIR"
-OUTPUT_DIR="$(cd "$OUTPUT_DIR" && pwd)"
 
 # Usar venv en common si existe, si no crear uno
 VENV_DIR="$COMMON_DIR/.venv"
@@ -48,10 +57,28 @@ if ! python3 -c "import cairosvg" 2>/dev/null; then
 else
     echo "✓ cairosvg ya está instalado"
 fi
+# Pillow: solo lo necesita --pwa (reducción de tamaños, favicon.ico)
+for arg in "$@"; do
+    if [ "$arg" = "--pwa" ]; then
+        if ! python3 -c "import PIL" 2>/dev/null; then
+            echo "Instalando Pillow..."
+            pip install -q pillow
+        else
+            echo "✓ Pillow ya está instalado"
+        fi
+        break
+    fi
+done
 
 echo ""
 echo "Generando iconos..."
-python3 "$SCRIPT_DIR/generate-icon.py" "$ICON_TEXT" "$OUTPUT_DIR" "$ICON_TYPE"
+if [ "$BATCH_MODE" = true ]; then
+    python3 "$SCRIPT_DIR/generate-icon.py" "$@"
+    echo ""
+    echo "✓ Iconos generados exitosamente!"
+    exit 0
+fi
+python3 "$SCRIPT_DIR/generate-icon.py" "$ICON_TEXT" "$OUTPUT_DIR" "$ICON_TYPE" "${@:4}"
 
 echo ""
 echo "✓ Iconos generados exitosamente!"
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Instrumentación compartida por las herramientas NRD (update-version, generate-icon, export-static, servidor).
+Mide fases con nombre (discovery, version update, watcher scan, render, write, ...) y, si se pide,
+guarda las estadísticas de cProfile. Desactivada, cada fase cuesta una comprobación de un booleano.
+Activación: --profile en cada herramienta (--profile-out ARCHIVO.prof para cProfile) o NRD_PROFILE:
+  NRD_PROFILE=1              tiempos por fase (resumen en stderr al terminar)
+  NRD_PROFILE=/tmp/x.prof    además, estadísticas de cProfile en ese archivo ({pid} se reemplaza por el pid)
+                             Para verlas: python3 -m pstats /tmp/x.prof
+cProfile solo mide el thread que lo activa (el principal); los tiempos por fase cuentan todos los threads,
+así que en fases concurrentes el total puede superar el tiempo real.
+Uso desde una herramienta (tools/<herramienta>/script.py):
+    sys.path.append(str(Path(__file__).resolve().parent.parent / 'profiling'))
+    import nrd_profiling as profiling
+    profiler = profiling.configure_from_args(args, 'update-version')
+    with profiler.phase('render'):
+        ...
+    profiler.report()
+El profiler es único por proceso: si el servidor importa update-version.py, sus fases se suman al mismo.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = 'NRD_PROFILE'
+_DISABLED_VALUES = {'', '0', 'no', 'false', 'off'}
+_ENABLED_VALUES = {'1', 'yes', 'true', 'on'}
+
+
+class _Phase:
+    """Context manager que suma la duración del bloque a la fase."""
+
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Profiler:
+    """Tiempos acumulados por fase (veces, total, máximo), seguro entre threads."""
+
+    def __init__(self):
+        self.enabled = False
+        self.label = None
+        self.stats_path = None
+        self._phases = {}  # nombre -> [veces, total (s), máximo (s)], en orden de aparición
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._started = time.perf_counter()
+
+    def configure(self, enabled=False, stats_path=None, label=None):
+        """Activa la medición; con stats_path también cProfile (en este thread) hasta report()."""
+        self.enabled = bool(enabled or stats_path)
+        if label:
+            self.label = label
+        if stats_path:
+            self.stats_path = str(stats_path).replace('{pid}', str(os.getpid()))
+            if self._cprofile is None:
+                import cProfile
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def phase(self, name):
+        """with profiler.phase('render'): ... — no hace nada si el profiler está desactivado."""
+        return _Phase(self, name) if self.enabled else _NULL_PHASE
+
+    def timed(self, name):
+        """Decorador: cada llamada a la función cuenta como una vez la fase name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Phase(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add(self, name, seconds, count=1, peak=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._phases.get(name)
+            if entry is None:
+                self._phases[name] = [count, seconds, seconds if peak is None else peak]
+            else:
+                entry[0] += count
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds if peak is None else peak)
+
+    def snapshot(self):
+        """{fase: [veces, total, máximo]} (copia; se puede serializar o pasar entre procesos)."""
+        with self._lock:
+            return {name: list(entry) for name, entry in self._phases.items()}
+
+    def drain(self):
+        """Como snapshot, pero vacía lo acumulado (p. ej. en un worker de un pool de procesos)."""
+        with self._lock:
+            phases, self._phases = self._phases, {}
+        return phases
+
+    def merge(self, phases):
+        """Suma las fases medidas en otro proceso (resultado de drain o snapshot)."""
+        for name, (count, total, peak) in (phases or {}).items():
+            self.add(name, total, count, peak)
+
+    def summary(self):
+        """Líneas del resumen: una por fase, con veces, total, media y máximo."""
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        title = f"⏱️  Perfil de {self.label}" if self.label else "⏱️  Perfil"
+        lines = [f"{title}: {elapsed_ms:.0f} ms en total (pid {os.getpid()})"]
+        phases = self.snapshot()
+        if phases:
+            width = max(len(name) for name in phases)
+            lines.append(f"   {'fase':<{width}}  {'veces':>6}  {'total':>10}  {'media':>9}  {'máx':>9}")
+            for name, (count, total, peak) in phases.items():
+                lines.append(f"   {name:<{width}}  {count:>6}  {total * 1000:>7.1f} ms  "
+                             f"{total * 1000 / count:>6.1f} ms  {peak * 1000:>6.1f} ms")
+        else:
+            lines.append("   (sin fases medidas)")
+        return lines
+
+    def report(self, file=None):
+        """Imprime el resumen (en stderr) y, si hay cProfile, guarda sus estadísticas."""
+        if not self.enabled:
+            return
+        lines = self.summary()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            try:
+                self._cprofile.dump_stats(self.stats_path)
+                lines.append(f"   📊 cProfile: {self.stats_path} (python3 -m pstats {self.stats_path})")
+            except OSError as e:
+                lines.append(f"   ⚠️  No se pudo guardar cProfile en {self.stats_path}: {e}")
+            self._cprofile = None
+        print('\n'.join(lines), file=file or sys.stderr, flush=True)
+
+
+# Un profiler por proceso, compartido por todas las herramientas cargadas en él
+PROFILER = Profiler()
+
+
+def phase(name):
+    return PROFILER.phase(name)
+
+
+def add_arguments(parser):
+    """Añade --profile y --profile-out al parser de argparse de una herramienta."""
+    parser.add_argument('--profile', action='store_true',
+                        help=f"medir tiempos por fase e imprimir un resumen al terminar (env {ENV_VAR}=1)")
+    parser.add_argument('--profile-out', metavar='ARCHIVO.prof',
+                        help=f"además, guardar estadísticas de cProfile (env {ENV_VAR}=ARCHIVO.prof)")
+
+
+def configure(enabled=None, stats_path=None, label=None):
+    """Configura PROFILER; lo que no se indique sale de NRD_PROFILE (1 = tiempos, otra cosa = ruta de cProfile)."""
+    value = os.environ.get(ENV_VAR, '').strip()
+    if value.lower() not in _DISABLED_VALUES:
+        enabled = True
+        if value.lower() not in _ENABLED_VALUES and not stats_path:
+            stats_path = value
+    return PROFILER.configure(bool(enabled), stats_path, label)
+
+
+def configure_from_args(args, label):
+    """configure() con los valores de add_arguments (args.profile, args.profile_out)."""
+    return configure(getattr(args, 'profile', False) or None, getattr(args, 'profile_out', None), label)
@@ -2,154 +2,1782 @@
 """
 Servidor HTTP genérico para proyectos NRD
 Sirve todos los proyectos en el mismo puerto con context paths diferentes.
-Incluye live reload: detecta cambios en el código y recarga la página en el navegador.
-Uso: python3 nrd-system-server.py [puerto]
+Incluye live reload: detecta cambios en el código y recarga solo las pestañas del proyecto afectado
+(los cambios de CSS se aplican sin recargar). /_nrd_live?project=X&since=SEQ devuelve los paths cambiados.
+Al arrancar actualiza en segundo plano la versión (cache busting) de todos los proyectos.
+Uso: python3 nrd-system-server.py [puerto] [--workers N] [--processes N] [--production] [--access-log ARCHIVO]
 Ejemplo: python3 nrd-system-server.py 80
+Con --processes N (pre-fork) un proceso maestro abre el socket y lo comparte con N procesos
+worker; SIGHUP al maestro (pid en --pid-file) recarga sin cortes: arranca workers nuevos y
+después drena los viejos.
 Accede a: http://localhost/nrd-rrhh/, http://localhost/nrd-compras/, etc.
+Live reload usa inotify en Linux y polling como fallback
+(forzar con NRD_LIVE_RELOAD_BACKEND=inotify|poll). El mismo watcher detecta proyectos nrd-*
+nuevos, borrados o renombrados y actualiza rutas y página principal sin reiniciar.
+Métricas en /_nrd_metrics (JSON, o formato Prometheus con ?format=prometheus).
+Un módulo ES pedido con ?bundle (p. ej. <script type="module" src="modules/index.js?bundle">) se sirve
+empaquetado con todos sus imports relativos en una sola respuesta, con source map en ?bundle=map.
+--profile (o NRD_PROFILE=1) mide las fases discovery, version update, watcher scan y bundle: el resumen
+se imprime al detener el servidor (uno por proceso en pre-fork) y se ve en vivo en /_nrd_metrics.
+
+También se puede usar en proceso (tests, benchmarks); importarlo no hace trabajo:
+    server = create_server(projects_dir, port=0, workers=8)   # proyectos y watcher se cargan a demanda
+    server.start()   # o server.serve() para atender en el thread actual
+    ... http://localhost:{server.port}/ ...
+    server.stop()
 """
 
 import sys
 import os
+import argparse
+import importlib.util
+import ctypes
+import ctypes.util
+import email.utils
+import errno
+import functools
+import gzip
+import hashlib
 import http.server
+import json
+import posixpath
+import re
 import socketserver
+import select
+import selectors
+import signal
+import socket
+import stat
+import struct
 import subprocess
 import threading
 import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.parse import unquote
+from urllib.parse import parse_qs, unquote, urlsplit
 
 # Extensiones a vigilar para live reload
 LIVE_RELOAD_EXTENSIONS = {'.html', '.js', '.css', '.json'}
-LIVE_RELOAD_POLL_INTERVAL = 1.0  # segundos
-LIVE_RELOAD_LAST_MTIME = [0.0]  # lista para poder mutar desde el thread
+LIVE_RELOAD_POLL_INTERVAL = 1.0  # segundos (solo backend de polling)
+LIVE_RELOAD_DEBOUNCE = 0.05  # segundos para agrupar ráfagas de eventos inotify
+# Directorios pesados que no se vigilan (dependencias, builds, VCS)
+LIVE_RELOAD_IGNORE_DIRS = {'node_modules', '.git', '.venv', 'venv', 'dist', '__pycache__',
+                           '.cache', '.pytest_cache', '.mypy_cache', '.tox'}
+# Backend del watcher: auto (inotify con fallback a polling), inotify o poll
+LIVE_RELOAD_BACKEND = os.environ.get('NRD_LIVE_RELOAD_BACKEND', 'auto').lower()
+LIVE_RELOAD_HEARTBEAT = 15.0  # segundos entre pings SSE (detecta clientes desconectados)
+LIVE_CHANGE_LOG_SIZE = 1024  # cambios recordados para responder ?since= (más atrás: recarga completa)
+
+# Concurrencia: pool de workers (0 = un thread por conexión) y keep-alive HTTP/1.1
+SERVER_WORKERS = int(os.environ.get('NRD_SERVER_WORKERS', '32'))
+KEEP_ALIVE_TIMEOUT = 15  # segundos que una conexión persistente puede quedar inactiva
+
+# Pre-fork: procesos worker que comparten el socket de escucha (0 = un solo proceso)
+SERVER_PROCESSES = int(os.environ.get('NRD_SERVER_PROCESSES', '0'))
+WORKER_READY_TIMEOUT = 15.0  # segundos que el maestro espera a que un worker nuevo esté escuchando
+DRAIN_TIMEOUT = 30.0  # segundos que un worker viejo espera a que terminen sus requests en curso
+WORKER_RESPAWN_DELAY = 1.0  # segundos entre reinicios de un worker que murió inesperadamente
+
+# Caché en memoria de archivos servidos (LRU con presupuesto de memoria)
+ASSET_CACHE_MAX_BYTES = int(os.environ.get('NRD_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+ASSET_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024  # archivos más grandes se leen siempre de disco
+
+# Compresión gzip al vuelo (se comprime una vez y se guarda en la caché junto al original).
+# Un hermano .gz al día (p. ej. de export-static) se usa tal cual; es lo único para archivos fuera de la caché
+GZIP_MIN_SIZE = 1024  # bytes; por debajo no compensa
+GZIP_LEVEL = 6
+GZIP_CONTENT_TYPES = {'application/javascript', 'application/json', 'application/manifest+json',
+                      'application/xml', 'image/svg+xml', 'text/javascript'}
+
+# Métricas y access log
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # segundos
+ACCESS_LOG_FLUSH_INTERVAL = 2.0  # segundos entre escrituras del access log a disco
+ACCESS_LOG_MAX_BUFFERED = 512  # líneas; al llegar a este número se escribe sin esperar al intervalo
+
+# Modo producción: URLs versionadas (?v=) se cachean como inmutables en el navegador
+SERVER_MODE = os.environ.get('NRD_SERVER_MODE', 'development').lower()
+IMMUTABLE_MAX_AGE = 31536000  # 1 año
 
 # Directorio base
 script_dir = Path(__file__).parent.resolve()
 common_dir = script_dir.parent.parent
-projects_dir = common_dir.parent
+DEFAULT_PROJECTS_DIR = common_dir.parent
+
+
+# Instrumentación compartida (tools/profiling/nrd_profiling.py): un solo profiler por proceso
+sys.path.append(str(script_dir.parent / 'profiling'))
+import nrd_profiling as profiling
+
+
+@profiling.PROFILER.timed('discovery')
+def discover_projects(projects_dir):
+    """Nombres de los proyectos nrd-* de projects_dir que tienen index.html, ordenados."""
+    return [project_dir.name for project_dir in sorted(Path(projects_dir).glob("nrd-*"))
+            if project_dir.is_dir() and (project_dir / "index.html").exists()]
+
+
+class AssetCache:
+    """Caché LRU en memoria de archivos servidos, indexada por (ruta resuelta, variante).
+
+    Cada entrada guarda el mtime y el tamaño del archivo del que salió: si el stat
+    actual no coincide, la entrada se descarta. El watcher además invalida por ruta
+    en cuanto detecta un cambio. La variante permite guardar derivados del archivo
+    (p. ej. el HTML con el script de live reload ya inyectado).
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # (path, variant) -> (mtime_ns, size, data)
+        self._lock = threading.Lock()
+
+    def get(self, path, st, variant=''):
+        key = (path, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, path, st, data, variant=''):
+        if len(data) > self.max_entry_bytes or len(data) > self.max_bytes:
+            return
+        key = (path, variant)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (st.st_mtime_ns, st.st_size, data)
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, path):
+        """Descarta todas las variantes de path (o de todo lo que cuelga de él si es un directorio)."""
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path or k[0].startswith(prefix)]:
+                self._remove(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= len(entry[2])
+
+
+# Librerías cuyo dist/ se sirve aunque el proyecto no tenga index.html
+DIST_LIBRARIES = ('nrd-common', 'nrd-data-access')
+ROUTE_CACHE_SIZE = 4096  # paths traducidos que se recuerdan
+RANGE_NOT_SATISFIABLE = object()  # marcador para responder 416
+
+
+class RouteTable:
+    """Tabla de rutas precalculada: primer segmento del path -> raíz ya resuelta del proyecto.
+
+    La traducción léxica ('..' normalizados sin subir por encima de la raíz) y la comprobación
+    con realpath de que el destino real (tras symlinks) siga dentro de la raíz resuelta se
+    memorizan juntas en un LRU propio de cada tabla. El watcher lo vacía con invalidate()
+    cuando cambia algo bajo los proyectos (p. ej. un symlink nuevo o redirigido).
+    """
+
+    def __init__(self, projects_dir, projects):
+        self.projects_dir = Path(projects_dir).resolve()
+        self.projects = list(projects)
+        self.roots = {name: str((self.projects_dir / name).resolve()) for name in self.projects}
+        self.dist_roots = {name: str((self.projects_dir / name / 'dist').resolve()) for name in DIST_LIBRARIES}
+        self.fallback_root = self.roots[self.projects[0]] if self.projects else None
+        self._translate = functools.lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._resolve)
+
+    def resolve(self, path):
+        """Traduce un path de URL (sin query, ya decodificado) a una ruta del sistema, o None.
+
+        None también si un symlink lleva fuera de la raíz."""
+        return self._translate(path)
+
+    def invalidate(self):
+        """Olvida las traducciones memorizadas: los symlinks pueden haber cambiado."""
+        self._translate.cache_clear()
+
+    def _resolve(self, path):
+        translated = self._lexical(path)
+        if translated is None:
+            return None
+        root, target = translated
+        real = os.path.realpath(target)
+        if real != root and not real.startswith(root.rstrip(os.sep) + os.sep):
+            return None
+        return target
+
+    def _lexical(self, path):
+        """(raíz, ruta) léxica de un path de URL, o None."""
+        if '\0' in path:
+            return None
+        first, _, rest = path.lstrip('/').partition('/')
+        if not first:
+            return None  # '/': lista de proyectos
+        root = self.roots.get(first)
+        if root is not None:
+            return self._contain(root, rest or 'index.html')
+        if first in self.dist_roots and rest.startswith('dist/'):
+            return self._contain(self.dist_roots[first], rest[len('dist/'):])
+        # Para cualquier otro path, intentar servirlo desde el primer proyecto (fallback)
+        if self.fallback_root is None:
+            return None
+        return self._contain(self.fallback_root, path.lstrip('/'))
+
+    @staticmethod
+    def _contain(root, relative_path):
+        normalized = posixpath.normpath('/' + relative_path)
+        if normalized == '/':
+            return root, root
+        return root, root + normalized.replace('/', os.sep)
+
+# Script inyectado en cada HTML servido: EventSource (un stream por navegador) con fallback a polling.
+# La pestaña líder reenvía los eventos y un latido por BroadcastChannel; sin latido, las demás hacen polling.
+LIVE_RELOAD_SCRIPT = b'''<script>(function(){
+var project=location.pathname.split("/")[1]||"",seq=-1;
+function scope(){return "project="+encodeURIComponent(project)+(seq>=0?"&since="+seq:"");}
+function loaded(p){var es=performance.getEntriesByType?performance.getEntriesByType("resource"):[];
+for(var i=0;i<es.length;i++){try{if(new URL(es[i].name).pathname===p)return true;}catch(_){}}return false;}
+function swapCss(p){var ls=document.querySelectorAll('link[rel="stylesheet"]'),found=false;
+Array.prototype.forEach.call(ls,function(l){var u=new URL(l.href,location.href);
+if(u.origin!==location.origin||u.pathname!==p)return;found=true;u.searchParams.set("_nrd",Date.now());
+var n=l.cloneNode();n.href=u.href;n.onload=n.onerror=function(){l.remove();};l.parentNode.insertBefore(n,l.nextSibling);});
+return found;}
+function apply(d){if(typeof d.seq!=="number")return;if(seq<0){seq=d.seq;return;}if(d.seq<=seq)return;seq=d.seq;
+if(!d.paths){location.reload();return;}var reload=false;
+d.paths.forEach(function(p){if(/\\.css$/.test(p)&&swapCss(p))return;
+if(p.indexOf("/"+project+"/")===0||loaded(p))reload=true;});
+if(reload)location.reload();}
+function check(){fetch("/_nrd_live?"+scope()).then(function(r){return r.json();}).then(apply).catch(function(){});}
+function poll(){setInterval(check,1500);check();}
+function handle(data){try{apply(JSON.parse(data));}catch(_){}}
+function stream(bc,url){var es=new EventSource(url),opened=false;
+es.onopen=function(){opened=true;};
+es.onmessage=function(e){if(bc)bc.postMessage(e.data);handle(e.data);};
+es.onerror=function(){if(!opened){es.close();poll();}};
+if(bc)setInterval(function(){if(es.readyState===1)bc.postMessage("hb");},4000);}
+if(!window.EventSource){poll();return;}
+if(window.BroadcastChannel&&navigator.locks){
+fetch("/_nrd_live?"+scope()).then(function(r){return r.json();}).then(function(d){if(seq<0)seq=d.seq;}).catch(function(){});
+var bc=new BroadcastChannel("nrd-live"),leader=false,beat=Date.now();
+bc.onmessage=function(e){beat=Date.now();if(e.data!=="hb")handle(e.data);};
+setInterval(function(){if(!leader&&Date.now()-beat>10000)check();},1500);
+navigator.locks.request("nrd-live",function(){leader=true;stream(bc,"/_nrd_live?stream=1"+(seq>=0?"&since="+seq:""));return new Promise(function(){});});
+return;}
+stream(null,"/_nrd_live?stream=1&"+scope());
+})();</script>'''
+# Sufijo del ETag del HTML: cambia si cambia el script inyectado, aunque el archivo no cambie
+LIVE_RELOAD_ETAG_SUFFIX = '-lr%x' % zlib.crc32(LIVE_RELOAD_SCRIPT)
+
+
+class Metrics:
+    """Contadores por ruta y proyecto: requests, bytes, status, aciertos de caché e histograma de latencia."""
+
+    def __init__(self, asset_cache):
+        self.started = time.time()
+        self.asset_cache = asset_cache
+        self._series = {}  # (route, project) -> dict de contadores
+        self._lock = threading.Lock()
+        # backend: el que vigila ahora (inotify/poll); last_scan_kind: initial, inotify (registro de watches) o poll
+        self.watcher = {'backend': None, 'last_scan_kind': None, 'last_scan_seconds': None,
+                        'last_scan_at': None, 'scans': 0}
+
+    def observe(self, route, project, status, sent_bytes, seconds, cache_hit):
+        key = (route, project)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'requests': 0, 'bytes': 0, 'status': {}, 'cache_hits': 0, 'cache_misses': 0,
+                    'latency_buckets': [0] * len(METRICS_LATENCY_BUCKETS), 'latency_sum': 0.0,
+                }
+            series['requests'] += 1
+            series['bytes'] += sent_bytes
+            series['status'][status] = series['status'].get(status, 0) + 1
+            if cache_hit is not None:
+                series['cache_hits' if cache_hit else 'cache_misses'] += 1
+            series['latency_sum'] += seconds
+            for i, bound in enumerate(METRICS_LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series['latency_buckets'][i] += 1
+                    break
+
+    def set_backend(self, backend):
+        """Backend activo del watcher: 'inotify' o 'poll'."""
+        with self._lock:
+            self.watcher['backend'] = backend
+
+    def record_scan(self, kind, seconds):
+        """Duración del último recorrido del watcher: kind es 'initial', 'inotify' (registro de watches) o 'poll'."""
+        with self._lock:
+            self.watcher.update(last_scan_kind=kind, last_scan_seconds=seconds,
+                                last_scan_at=time.time(), scans=self.watcher['scans'] + 1)
+
+    def snapshot(self):
+        with self._lock:
+            routes = []
+            for (route, project), series in sorted(self._series.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(METRICS_LATENCY_BUCKETS, series['latency_buckets']):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                buckets['+Inf'] = series['requests']
+                routes.append({
+                    'route': route, 'project': project, 'requests': series['requests'],
+                    'bytes': series['bytes'], 'status': {str(k): v for k, v in sorted(series['status'].items())},
+                    'cache_hits': series['cache_hits'], 'cache_misses': series['cache_misses'],
+                    'latency_seconds': {'sum': series['latency_sum'], 'buckets': buckets},
+                })
+            watcher = dict(self.watcher)
+        data = {
+            'uptime_seconds': time.time() - self.started,
+            'routes': routes,
+            'asset_cache': {'bytes': self.asset_cache.total_bytes, 'max_bytes': self.asset_cache.max_bytes,
+                            'entries': len(self.asset_cache)},
+            'watcher': watcher,
+        }
+        if profiling.PROFILER.enabled:
+            data['profile'] = {name: {'count': count, 'total_seconds': total, 'max_seconds': peak}
+                               for name, (count, total, peak) in profiling.PROFILER.snapshot().items()}
+        return data
+
+    def to_prometheus(self):
+        """Serializa snapshot() en el formato de texto de Prometheus."""
+        data = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                                      for k, v in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        routes = data['routes']
+        metric('nrd_http_requests_total', 'counter', 'Requests atendidos por ruta, proyecto y status.',
+               [({'route': s['route'], 'project': s['project'], 'status': status}, count)
+                for s in routes for status, count in s['status'].items()])
+        metric('nrd_http_response_bytes_total', 'counter', 'Bytes de body enviados.',
+               [({'route': s['route'], 'project': s['project']}, s['bytes']) for s in routes])
+        cached = [s for s in routes if s['cache_hits'] or s['cache_misses']]
+        metric('nrd_http_cache_hits_total', 'counter', 'Respuestas servidas desde la caché en memoria.',
+               [({'route': s['route'], 'project': s['project']}, s['cache_hits']) for s in cached])
+        metric('nrd_http_cache_misses_total', 'counter', 'Respuestas que tuvieron que leer de disco.',
+               [({'route': s['route'], 'project': s['project']}, s['cache_misses']) for s in cached])
+        lines.append('# HELP nrd_http_request_duration_seconds Latencia de los requests.')
+        lines.append('# TYPE nrd_http_request_duration_seconds histogram')
+        for s in routes:
+            labels = 'route="%s",project="%s"' % (s['route'], s['project'])
+            for bound, count in s['latency_seconds']['buckets'].items():
+                lines.append('nrd_http_request_duration_seconds_bucket{%s,le="%s"} %s' % (labels, bound, count))
+            lines.append('nrd_http_request_duration_seconds_sum{%s} %s' % (labels, s['latency_seconds']['sum']))
+            lines.append('nrd_http_request_duration_seconds_count{%s} %s' % (labels, s['requests']))
+        cache = data['asset_cache']
+        metric('nrd_asset_cache_bytes', 'gauge', 'Bytes en la caché de archivos.', [({}, cache['bytes'])])
+        metric('nrd_asset_cache_entries', 'gauge', 'Entradas en la caché de archivos.', [({}, cache['entries'])])
+        watcher = data['watcher']
+        if watcher['last_scan_seconds'] is not None:
+            metric('nrd_watcher_last_scan_seconds', 'gauge', 'Duración del último recorrido del watcher.',
+                   [({'backend': watcher['backend'], 'kind': watcher['last_scan_kind']},
+                     watcher['last_scan_seconds'])])
+        if 'profile' in data:
+            phases = sorted(data['profile'].items())
+            metric('nrd_phase_seconds_total', 'counter', 'Tiempo acumulado por fase (--profile).',
+                   [({'phase': name}, phase['total_seconds']) for name, phase in phases])
+            metric('nrd_phase_runs_total', 'counter', 'Veces que se ejecutó cada fase (--profile).',
+                   [({'phase': name}, phase['count']) for name, phase in phases])
+        metric('nrd_uptime_seconds', 'gauge', 'Segundos desde el arranque.', [({}, data['uptime_seconds'])])
+        return '\n'.join(lines) + '\n'
+
+
+class AccessLog:
+    """Access log estructurado (una línea JSON por request) que se escribe a disco por lotes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lines = []
+        self._lock = threading.Lock()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._lines.append(line)
+            if len(self._lines) < ACCESS_LOG_MAX_BUFFERED:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+            if lines and not self._file.closed:
+                self._file.write('\n'.join(lines) + '\n')
+                self._file.flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._file.close()
+
+    def _flush_periodically(self):
+        while not self._file.closed:
+            time.sleep(ACCESS_LOG_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                pass
+
+
+
+class LiveChangeIndex:
+    """Índice de cambios del watcher para el live reload con alcance por proyecto.
+
+    Cada cambio se guarda como (seq, proyecto, path de URL). seq es el mtime del archivo en
+    microsegundos (creciente): todos los procesos worker ven el mismo valor para el mismo
+    cambio, así un cliente puede seguir con su ?since= aunque reconecte a otro worker.
+    Un path None significa "no se sabe qué cambió" (cola de inotify desbordada): recarga completa.
+    """
+
+    def __init__(self, projects_dir, max_entries=LIVE_CHANGE_LOG_SIZE):
+        self.projects_dir = str(projects_dir)
+        self.seq = 0
+        self.last_mtime = 0.0  # t (segundos) para páginas que todavía tienen el script anterior
+        self.base_seq = 0  # cambios anteriores a este seq no están en el índice
+        self.project_seq = {}  # proyecto -> último seq que lo tocó
+        self._log = deque(maxlen=max_entries)
+
+    def reset(self, seq):
+        self.seq = self.base_seq = seq
+        self.last_mtime = seq / 1e6
+        self.project_seq.clear()
+        self._log.clear()
+
+    def url_path(self, path):
+        relative = os.path.relpath(path, self.projects_dir)
+        if relative == '.' or relative.startswith('..'):
+            return None
+        return '/' + relative.replace(os.sep, '/')
+
+    def record(self, changes):
+        """Registra un lote de cambios [(path del sistema o None, mtime en µs o None)]; devuelve el seq nuevo."""
+        seq = max((mtime for _, mtime in changes if mtime), default=0)
+        if seq <= self.seq:
+            # Borrados, o archivos con mtime antiguo (cp -p, checkout): igual tienen que avanzar el seq
+            seq = max(int(time.time() * 1e6), self.seq + 1)
+        for path, _ in changes:
+            url_path = self.url_path(path) if path is not None else None
+            project = url_path.split('/', 2)[1] if url_path else None
+            if len(self._log) == self._log.maxlen:
+                self.base_seq = self._log[0][0]
+            self._log.append((seq, project, url_path))
+            if project is not None:
+                self.project_seq[project] = seq
+        self.seq = seq
+        self.last_mtime = max(seq / 1e6, self.last_mtime + 0.001)
+        return seq
+
+    def changes_since(self, since, project=None):
+        """Paths de URL cambiados después de since que afectan a project (None = todos los proyectos).
+
+        Los cambios de librerías compartidas (DIST_LIBRARIES) se incluyen siempre: el cliente
+        decide si la página las cargó. Devuelve None si hace falta recargar la página completa."""
+        if since >= self.seq:
+            return []
+        if since < self.base_seq:
+            return None
+        if project is not None and self.project_seq.get(project, 0) <= since and not any(
+                self.project_seq.get(name, 0) > since for name in DIST_LIBRARIES):
+            # Atajo: nada de este proyecto ni compartido; solo puede quedar un cambio sin path
+            if all(url_path is not None for seq, _, url_path in self._log if seq > since):
+                return []
+        paths = []
+        for seq, entry_project, url_path in self._log:
+            if seq <= since:
+                continue
+            if url_path is None:
+                return None
+            if project is None or entry_project == project or entry_project in DIST_LIBRARIES:
+                if url_path not in paths:
+                    paths.append(url_path)
+        return paths
+
+    def event(self, since=None, project=None):
+        """Cuerpo de /_nrd_live: seq actual, paths cambiados desde since y t (compatibilidad)."""
+        paths = [] if since is None else self.changes_since(since, project)
+        return {'t': self.last_mtime, 'seq': self.seq, 'paths': paths}
+
+
+# Empaquetado a demanda de módulos ES: /proyecto/entrada.js?bundle (source map en ?bundle=map)
+BUNDLE_EXTENSIONS = ('.js', '.mjs')
+
+
+class BundleError(Exception):
+    """El grafo de módulos no se puede empaquetar (sintaxis no soportada o dependencia inexistente)."""
+
+
+# Sentencias import/export de primer nivel (al inicio de línea). Lo que no encaja en una de las
+# formas conocidas cae en 'unsupported' y la entrada se sirve sin empaquetar.
+_MODULE_STATEMENT = re.compile(r'''
+    ^[ \t]*(?:
+        import(?=[\s{*])\s*(?P<import_clause>[\w$]+(?:\s*,\s*(?:\{[^}]*\}|\*\s*as\s+[\w$]+))?|\{[^}]*\}|\*\s*as\s+[\w$]+)
+            \s*from\s*(?P<q1>['"])(?P<import_spec>[^'"\n]+)(?P=q1)
+      | import\s*(?P<q2>['"])(?P<side_spec>[^'"\n]+)(?P=q2)
+      | export\s*(?P<reexport_clause>\*(?:\s*as\s+[\w$]+)?|\{[^}]*\})\s*from\s*(?P<q3>['"])(?P<reexport_spec>[^'"\n]+)(?P=q3)
+      | export\s*\{(?P<export_list>[^}]*)\}
+      | export\s+(?P<default>default\b)\s*(?:(?P<default_kind>(?:async\s+)?function\b\s*\*?|class\b)\s*(?P<default_name>(?!extends\b)[\w$]+)?)?
+      | export\s+(?P<decl_kind>(?:async\s+)?function\b\s*\*?|class\b|const\b|let\b|var\b)\s*(?P<decl_name>[\w$]+)?
+      | export\b(?P<unsupported>)
+    )(?P<semicolon>[ \t]*;)?''', re.M | re.X)
+_DYNAMIC_IMPORT = re.compile(r'''\bimport\s*\(\s*(['"])(\.{1,2}/[^'"\n]+)\1''')
+_IMPORT_META = re.compile(r'\bimport\.meta\b')
+_TOP_LEVEL_AWAIT = re.compile(r'^await\b', re.M)
+_NEXT_IDENTIFIER = re.compile(r'\s*([\w$]+)')
+# Declaraciones let/var (también con destructuring): un export de esos nombres puede cambiar de valor
+_MUTABLE_DECLARATION = re.compile(r'(?<![\w$.])(?:let|var)\s*(?:([\w$]+)|([{\[][^=;]*))')
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+
+# Registro mínimo del bundle: cada módulo es una función que se evalúa una vez, la primera vez que se importa
+_BUNDLE_RUNTIME = '''const __nrd_factories = new Map(), __nrd_instances = new Map();
+function __nrd_define(id, factory) { __nrd_factories.set(id, factory); }
+function __nrd_require(id) {
+  let exports = __nrd_instances.get(id);
+  if (exports) return exports;
+  exports = Object.create(null);
+  __nrd_instances.set(id, exports);
+  __nrd_factories.get(id)(exports, __nrd_require, { url: new URL(id, import.meta.url).href });
+  return exports;
+}
+function __nrd_export(exports, getters) {
+  for (const name in getters) Object.defineProperty(exports, name, { enumerable: true, get: getters[name] });
+}
+function __nrd_star(exports, source) {
+  for (const name in source) {
+    if (name !== 'default' && !(name in exports)) Object.defineProperty(exports, name, { enumerable: true, get: () => source[name] });
+  }
+}
+'''
+
+
+def _resolve_specifier(module_id, spec):
+    """id (path de URL) de un import relativo o absoluto; None para externos (paquetes o URLs)."""
+    if not spec.startswith(('./', '../', '/')) or spec.startswith('//'):
+        return None
+    path = spec.split('?', 1)[0].split('#', 1)[0]
+    if not path.startswith('/'):
+        path = posixpath.join(posixpath.dirname(module_id), path)
+    return posixpath.normpath(path)
+
 
-# Obtener puerto
-port = int(sys.argv[1]) if len(sys.argv) > 1 else 80
+def _external_name(spec):
+    return '__nrd_ext_' + hashlib.sha1(spec.encode('utf-8')).hexdigest()[:10]
 
-# Detectar todos los proyectos disponibles
-projects = []
-for project_dir in sorted(projects_dir.glob("nrd-*")):
-    if project_dir.is_dir() and (project_dir / "index.html").exists():
-        projects.append(project_dir.name)
 
-if not projects:
-    print("❌ No se encontraron proyectos NRD con index.html")
-    sys.exit(1)
+def _bindings(clause):
+    """'a, b as c' -> [('a', 'a'), ('b', 'c')]: (nombre en el módulo de origen, nombre local/exportado)."""
+    pairs = []
+    for part in clause.split(','):
+        names = re.split(r'\s+as\s+', part.strip())
+        if names[0]:
+            pairs.append((names[0], names[-1]))
+    return pairs
 
 
-def _live_reload_watcher():
-    """Thread que actualiza LIVE_RELOAD_LAST_MTIME con el mtime más reciente de archivos fuente."""
-    while True:
+def _more_declarators(source, start):
+    """Nombres de los declaradores siguientes de 'const a = 1, b = 2;' a partir de start (después de 'a').
+
+    Recorre hasta el ';' (o fin de línea sin coma pendiente) de primer nivel, saltando strings,
+    comentarios y paréntesis/llaves/corchetes."""
+    names, depth, i, n = [], 0, start, len(source)
+    last = ''
+    while i < n:
+        ch = source[i]
+        if ch in '\'"`':
+            i += 1
+            while i < n and source[i] != ch:
+                i += 2 if source[i] == '\\' else 1
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            if i < 0:
+                break
+            continue
+        elif source.startswith('/*', i):
+            i = source.find('*/', i + 2)
+            if i < 0:
+                break
+            i += 1
+        elif ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+            if depth < 0:
+                break
+        elif depth == 0 and ch == ';':
+            break
+        elif depth == 0 and ch == '\n' and last not in (',', '=', ''):
+            break
+        elif depth == 0 and ch == ',':
+            m = _NEXT_IDENTIFIER.match(source, i + 1)
+            if m:
+                names.append(m.group(1))
+        if not ch.isspace():
+            last = ch
+        i += 1
+    return names
+
+
+def _mutable_names(source):
+    """Nombres declarados con let/var en source (en cualquier nivel: ante la duda, se consideran mutables)."""
+    names = set()
+    for m in _MUTABLE_DECLARATION.finditer(source):
+        if m.group(1):
+            names.add(m.group(1))
+            names.update(_more_declarators(source, m.end(1)))
+        else:
+            names.update(_IDENTIFIER.findall(m.group(2)))
+    return names
+
+
+def _find_cycle(modules):
+    """Primer ciclo de imports entre los módulos del bundle (lista de ids), o None."""
+    state = {}  # id -> 1 en el camino actual, 2 terminado
+    for start in modules:
+        if start in state:
+            continue
+        path, stack = [start], [iter(modules[start].deps)]
+        state[start] = 1
+        while stack:
+            dep = next(stack[-1], None)
+            if dep is None:
+                state[path.pop()] = 2
+                stack.pop()
+            elif state.get(dep) == 1:
+                return path[path.index(dep):] + [dep]
+            elif dep not in state and dep in modules:
+                state[dep] = 1
+                path.append(dep)
+                stack.append(iter(modules[dep].deps))
+    return None
+
+
+class _BundledModule:
+    """Un módulo ya transformado para el registro del bundle, válido mientras no cambie (mtime, tamaño).
+
+    Los imports se convierten en copias (const { a } = __nrd_require(...)): por eso un módulo que
+    exporta variables let/var no se empaqueta, su valor cambiaría en el original pero no en la copia.
+    """
+
+    def __init__(self, module_id, key, source):
+        self.id = module_id
+        self.key = key
+        self.deps = []  # ids de los módulos importados
+        self.externals = []  # especificadores externos (se importan de verdad en la cabecera del bundle)
+        self.names = []  # exports propios
+        self.stars = []  # ids con export *
+        getters = []
+
+        def source_of(spec):
+            dep = _resolve_specifier(module_id, spec)
+            if dep is None:
+                if spec not in self.externals:
+                    self.externals.append(spec)
+                return _external_name(spec)
+            if dep not in self.deps:
+                self.deps.append(dep)
+            return '__nrd_require(%s)' % json.dumps(dep)
+
+        def export(name, expression):
+            self.names.append(name)
+            getters.append('%s: () => %s' % (json.dumps(name), expression))
+
+        def rewrite(m):
+            # El reemplazo conserva los saltos de línea: el source map es línea a línea
+            newlines = '\n' * m.group(0).count('\n')
+            if m.group('unsupported') is not None:
+                raise BundleError('export no soportado en %s: %s' % (module_id, m.group(0).strip()[:60]))
+            if m.group('import_clause') is not None:
+                clause, src = m.group('import_clause').strip(), source_of(m.group('import_spec'))
+                declarations = []
+                default, _, rest = clause.partition(',') if not clause.startswith(('{', '*')) else ('', '', clause)
+                if default.strip():
+                    declarations.append('%s = %s.default' % (default.strip(), src))
+                rest = rest.strip()
+                if rest.startswith('*'):
+                    declarations.append('%s = %s' % (rest.split()[-1], src))
+                elif rest.startswith('{'):
+                    pairs = _bindings(rest.strip('{} \t\n'))
+                    declarations.append('{ %s } = %s' % (', '.join(
+                        local if name == local else '%s: %s' % (name, local) for name, local in pairs), src))
+                return (('const %s;' % ', '.join(declarations)) if declarations else src + ';') + newlines
+            if m.group('side_spec') is not None:
+                src = source_of(m.group('side_spec'))
+                return (src + ';' if src.startswith('__nrd_require') else '') + newlines
+            if m.group('reexport_clause') is not None:
+                clause, src = m.group('reexport_clause').strip(), source_of(m.group('reexport_spec'))
+                if clause == '*':
+                    dep = _resolve_specifier(module_id, m.group('reexport_spec'))
+                    if dep is None:
+                        raise BundleError('export * de un módulo externo en %s' % module_id)
+                    self.stars.append(dep)
+                    return '__nrd_star(__nrd_exports, %s);' % src + newlines
+                if clause.startswith('*'):
+                    export(clause.split()[-1], src)
+                else:
+                    for name, exported in _bindings(clause.strip('{} \t\n')):
+                        export(exported, '%s.%s' % (src, name))
+                # Se evalúa en el mismo lugar que el módulo original
+                return (src + ';' if src.startswith('__nrd_require') else '') + newlines
+            if m.group('export_list') is not None:
+                for local, exported in _bindings(m.group('export_list')):
+                    exported_locals.append(local)
+                    export(exported, local)
+                return newlines
+            if m.group('default') is not None:
+                kind, name = m.group('default_kind'), m.group('default_name')
+                if kind and name:
+                    export('default', name)
+                    return '%s %s' % (' '.join(kind.split()), name) + newlines
+                export('default', '__nrd_default')
+                return 'const __nrd_default = ' + (' '.join(kind.split()) + ' ' if kind else '') + newlines
+            kind, name = m.group('decl_kind'), m.group('decl_name')
+            if not name:
+                raise BundleError('export no soportado en %s: %s' % (module_id, m.group(0).strip()[:60]))
+            if kind in ('let', 'var'):
+                raise BundleError('%s exporta la variable %s %s (los imports empaquetados son copias)'
+                                  % (module_id, kind, name))
+            export(name, name)
+            if kind == 'const':
+                for other in _more_declarators(source, m.end('decl_name')):
+                    export(other, other)
+            return '%s %s' % (' '.join(kind.split()), name) + (m.group('semicolon') or '') + newlines
+
+        if _TOP_LEVEL_AWAIT.search(source):
+            raise BundleError('await de primer nivel en %s' % module_id)
+        exported_locals = []
+        body = _MODULE_STATEMENT.sub(rewrite, source)
+        mutable = sorted(set(exported_locals) & _mutable_names(source)) if exported_locals else []
+        if mutable:
+            raise BundleError('%s exporta variables let/var: %s (los imports empaquetados son copias)'
+                              % (module_id, ', '.join(mutable)))
+        body = _DYNAMIC_IMPORT.sub(lambda m: 'import(%s' % json.dumps(_resolve_specifier(module_id, m.group(2))), body)
+        body = _IMPORT_META.sub('__nrd_meta', body)
+        header = '__nrd_define(%s, function (__nrd_exports, __nrd_require, __nrd_meta) {' % json.dumps(module_id)
+        if getters:
+            header += ' __nrd_export(__nrd_exports, { %s });' % ', '.join(getters)
+        self.header = header
+        self.body = body
+        self.line_count = body.count('\n') + 1
+
+
+class _Bundle:
+    """Resultado de empaquetar una entrada: código, source map y los archivos de los que salió."""
+
+    def __init__(self, members, code=None, source_map=None, error=None):
+        self.members = members  # path del sistema -> (mtime_ns, tamaño), None si no existía
+        self.code = code
+        self.source_map = source_map
+        self.error = error
+        self.mtime = max((key[0] for key in members.values() if key is not None), default=0) / 1e9
+        self.etag = hashlib.sha1(code).hexdigest()[:16] if code is not None else None
+        self._gzipped = {}
+
+    def gzipped(self, kind):
+        body = self._gzipped.get(kind)
+        if body is None:
+            body = self._gzipped[kind] = gzip.compress(self.source_map if kind == 'map' else self.code,
+                                                       GZIP_LEVEL, mtime=0)
+        return body
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size) if stat.S_ISREG(st.st_mode) else None
+
+
+class ModuleBundler:
+    """Empaqueta un módulo ES de entrada con sus dependencias relativas en una sola respuesta.
+
+    Los imports se leen con expresiones regulares (sentencias de primer nivel) y cada módulo
+    se convierte en una función de un registro mínimo; el bundle exporta lo mismo que la
+    entrada. Los grafos con ciclos o con exports let/var se sirven sin empaquetar. Los módulos
+    transformados y los bundles armados (también los fallidos, con las dependencias que
+    faltaban) se guardan validados por (mtime, tamaño) y el watcher descarta los que cambian:
+    solo se rehacen esos módulos. El empaquetado corre fuera del lock.
+    """
+
+    def __init__(self):
+        self._modules = {}  # path del sistema -> _BundledModule
+        self._bundles = {}  # path del sistema de la entrada -> _Bundle
+        self._lock = threading.Lock()
+
+    def invalidate(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            for module_path in [p for p in self._modules if p == path or p.startswith(prefix)]:
+                del self._modules[module_path]
+            for entry, bundle in list(self._bundles.items()):
+                if any(p == path or p.startswith(prefix) for p in bundle.members):
+                    del self._bundles[entry]
+
+    def clear(self):
+        with self._lock:
+            self._modules.clear()
+            self._bundles.clear()
+
+    def get(self, routes, entry_id):
+        """_Bundle de entry_id (path de URL); None si la entrada no existe. Si no se pudo empaquetar, error tiene el motivo."""
+        entry_path = routes.resolve(entry_id)
+        if entry_path is None or _stat_key(entry_path) is None:
+            return None
+        with self._lock:
+            bundle = self._bundles.get(entry_path)
+        if bundle is not None and all(_stat_key(path) == key for path, key in bundle.members.items()):
+            return bundle
+        # Dos requests simultáneos pueden armar el mismo bundle; cualquiera de los dos sirve
+        bundle = self._build(routes, entry_id)
+        with self._lock:
+            self._bundles[entry_path] = bundle
+        return bundle
+
+    def _module(self, module_id, path, key):
+        if key is None:
+            raise BundleError('no existe %s' % module_id)
+        with self._lock:
+            module = self._modules.get(path)
+        if module is None or module.key != key or module.id != module_id:
+            with open(path, 'rb') as f:
+                source = f.read().decode('utf-8')
+            module = _BundledModule(module_id, key, source)
+            with self._lock:
+                self._modules[path] = module
+        return module
+
+    @profiling.PROFILER.timed('bundle')
+    def _build(self, routes, entry_id):
+        modules, members, pending = {}, {}, [entry_id]
         try:
-            latest = 0.0
-            for project_name in projects:
-                project_root = projects_dir / project_name
-                if not project_root.is_dir():
+            while pending:
+                module_id = pending.pop()
+                if module_id in modules:
                     continue
-                for root, _dirs, files in os.walk(project_root):
-                    for name in files:
-                        if Path(name).suffix.lower() in LIVE_RELOAD_EXTENSIONS:
-                            p = Path(root) / name
-                            try:
-                                m = p.stat().st_mtime
-                                if m > latest:
-                                    latest = m
-                            except OSError:
-                                pass
-            if latest > 0:
-                LIVE_RELOAD_LAST_MTIME[0] = latest
-        except Exception:
-            pass
-        time.sleep(LIVE_RELOAD_POLL_INTERVAL)
+                path = routes.resolve(module_id)
+                if path is None:
+                    raise BundleError('%s está fuera de los proyectos' % module_id)
+                # Antes de leerlo: si falta (key None), crearlo invalida el bundle fallido
+                members[path] = _stat_key(path)
+                module = modules[module_id] = self._module(module_id, path, members[path])
+                pending.extend(reversed(module.deps))
+            cycle = _find_cycle(modules)
+            if cycle:
+                raise BundleError('import circular %s' % ' -> '.join(cycle))
+            names = self._export_names(modules, entry_id)
+        except (BundleError, OSError, UnicodeDecodeError) as e:
+            print(f"⚠️  Bundle de {entry_id} no disponible ({e}); se sirve sin empaquetar", flush=True)
+            return _Bundle({path: key for path, key in members.items()}, error=str(e))
+
+        externals = []
+        for module in modules.values():
+            externals += [spec for spec in module.externals if spec not in externals]
+        lines = [_BUNDLE_RUNTIME.rstrip('\n')]
+        lines += ['import * as %s from %s;' % (_external_name(spec), json.dumps(spec)) for spec in externals]
+        code = '\n'.join(lines) + '\n'
+        line = code.count('\n')
+        sections = []
+        for module in modules.values():
+            # Una sección del source map por módulo: sus líneas se mantienen 1 a 1
+            sections.append({'offset': {'line': line + 1, 'column': 0}, 'map': {
+                'version': 3, 'sources': [module.id], 'names': [],
+                'mappings': 'AAAA' + ';AACA' * (module.line_count - 1)}})
+            code += module.header + '\n' + module.body + '\n});\n'
+            line += 1 + module.line_count + 1
+        code += 'const __nrd_entry = __nrd_require(%s);\n' % json.dumps(entry_id)
+        named = sorted(name for name in names if name != 'default')
+        if named:
+            code += 'export const { %s } = __nrd_entry;\n' % ', '.join(named)
+        if 'default' in names:
+            code += 'export default __nrd_entry.default;\n'
+        code += '//# sourceMappingURL=%s?bundle=map\n' % posixpath.basename(entry_id)
+        source_map = {'version': 3, 'file': posixpath.basename(entry_id), 'sections': sections}
+        return _Bundle(members, code.encode('utf-8'),
+                       json.dumps(source_map, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _export_names(modules, entry_id):
+        """Nombres que exporta la entrada (los de export * se siguen por el grafo, sin default)."""
+        names, seen, pending = set(modules[entry_id].names), {entry_id}, list(modules[entry_id].stars)
+        while pending:
+            module_id = pending.pop()
+            if module_id in seen:
+                continue
+            seen.add(module_id)
+            names.update(name for name in modules[module_id].names if name != 'default')
+            pending.extend(modules[module_id].stars)
+        return names
+
+
+def _inject_live_reload(content):
+    """Inyecta LIVE_RELOAD_SCRIPT antes de </body>."""
+    marker = b'</body>'
+    return content.replace(marker, LIVE_RELOAD_SCRIPT + marker, 1) if marker in content else content
+
+
+def _is_compressible(content_type):
+    content_type = content_type.split(';', 1)[0].strip().lower()
+    return content_type.startswith('text/') or content_type in GZIP_CONTENT_TYPES
+
+
+def _is_ignored_dir(name, parent=None):
+    """Indica si un directorio debe excluirse del live reload (dependencias, builds, VCS).
+
+    El dist/ de las librerías compartidas (DIST_LIBRARIES) sí se vigila: sus rebuilds recargan las pestañas."""
+    if name == 'dist' and parent is not None and os.path.basename(parent.rstrip(os.sep)) in DIST_LIBRARIES:
+        return False
+    return name in LIVE_RELOAD_IGNORE_DIRS or name.endswith('.egg-info')
+
+
+def _is_watched_file(name):
+    return os.path.splitext(name)[1].lower() in LIVE_RELOAD_EXTENSIONS
 
 
-# Iniciar watcher para live reload en segundo plano
-_live_reload_thread = threading.Thread(target=_live_reload_watcher, daemon=True)
-_live_reload_thread.start()
+@profiling.PROFILER.timed('watcher scan')
+def _scan_mtimes(roots):
+    """Recorre los proyectos (saltando directorios ignorados) y devuelve {path: mtime en µs}."""
+    mtimes = {}
+    for project_root in roots:
+        if not project_root.is_dir():
+            continue
+        for root, dirs, files in os.walk(project_root):
+            dirs[:] = [d for d in dirs if not _is_ignored_dir(d, root)]
+            for name in files:
+                if _is_watched_file(name):
+                    path = os.path.join(root, name)
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime_ns // 1000
+                    except OSError:
+                        pass
+    return mtimes
 
-# Actualizar versión de todos los proyectos antes de iniciar
-print("📝 Actualizando versiones de proyectos...")
-for project_name in projects:
-    project_root = projects_dir / project_name
-    update_version_script = project_root / "tools" / "update-version" / "update-version.py"
-    if update_version_script.exists():
+
+class _InotifyWatcher:
+    """Watcher basado en inotify (Linux) vía ctypes: sin recorrer el árbol en cada intervalo."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, roots):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError('inotify no disponible en esta plataforma')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wds = {}
+        self._wake_read, self._wake_write = os.pipe()  # wake() despierta a read_events() para cerrar
         try:
-            subprocess.run([sys.executable, str(update_version_script), project_name], 
-                          cwd=project_root, check=False, capture_output=True)
-        except Exception:
+            for root in roots:
+                if root.is_dir():
+                    self.add_tree(str(root))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+
+    def wake(self):
+        if self._fd >= 0:
             try:
-                subprocess.run([sys.executable, str(update_version_script)], 
-                              cwd=project_root, check=False, capture_output=True)
+                os.write(self._wake_write, b'1')
+            except OSError:
+                pass
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, 'límite de inotify alcanzado (fs.inotify.max_user_watches)')
+            return  # directorio borrado entre el walk y el watch
+        self._wds[wd] = path
+
+    def add_dir(self, path):
+        """Vigila solo path, sin sus subdirectorios."""
+        self._add_watch(path)
+
+    def add_tree(self, root):
+        """Registra root y sus subdirectorios (no ignorados). Devuelve True si contiene archivos vigilados."""
+        found = False
+        for dirpath, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not _is_ignored_dir(d, dirpath)]
+            self._add_watch(dirpath)
+            if not found and any(_is_watched_file(name) for name in files):
+                found = True
+        return found
+
+    def remove_tree(self, root):
+        """Deja de vigilar root y sus subdirectorios (proyecto borrado o renombrado)."""
+        prefix = root.rstrip(os.sep) + os.sep
+        for wd, path in list(self._wds.items()):
+            if path == root or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._wds[wd]
+
+    def read_events(self, timeout=None):
+        """Espera eventos y devuelve una lista de (path, mask). None indica desbordamiento de la cola."""
+        ready, _, _ = select.select([self._fd, self._wake_read], [], [], timeout)
+        if self._fd not in ready:
+            return []
+        data = os.read(self._fd, 64 * 1024)
+        events = []
+        offset = 0
+        header_size = self._EVENT_HEADER.size
+        while offset + header_size <= len(data):
+            wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + header_size:offset + header_size + length].rstrip(b'\0')
+            offset += header_size + length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            if mask & self.IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            events.append((path, mask))
+        return events
+
+
+class ServerContext:
+    """Estado de una instancia del servidor: proyectos, tabla de rutas, caché, métricas y live reload.
+
+    Crearla no hace trabajo: los proyectos se detectan y la tabla de rutas se arma en el primer
+    request, y el watcher arranca con start_watcher() o con el primer cliente de /_nrd_live.
+    Con el watcher activo, los proyectos nrd-* que aparecen o desaparecen se detectan en caliente.
+    close() detiene el watcher y las conexiones SSE y cierra el access log.
+    """
+
+    def __init__(self, projects_dir, production=False, access_log=None):
+        self.projects_dir = Path(projects_dir).resolve()
+        self.production = production
+        self.access_log = AccessLog(access_log) if access_log else None
+        self.asset_cache = AssetCache(ASSET_CACHE_MAX_BYTES, ASSET_CACHE_MAX_ENTRY_BYTES)
+        self.metrics = Metrics(self.asset_cache)
+        self.live_changes = LiveChangeIndex(self.projects_dir)
+        self.bundler = ModuleBundler()
+        self.live_changed = threading.Condition()  # despierta a los clientes en streaming (SSE)
+        self.stopped = threading.Event()  # cierra las conexiones SSE y detiene el watcher
+        self.watcher_ready = threading.Event()  # recorrido inicial hecho: live_changes.seq ya es válido
+        self._routes = None
+        self._routes_lock = threading.Lock()
+        self._watcher_thread = None
+        self._watcher_lock = threading.Lock()
+        self._inotify = None
+
+    @property
+    def routes(self):
+        """Tabla de rutas; la primera vez detecta los proyectos y la construye."""
+        routes = self._routes
+        if routes is None:
+            with self._routes_lock:
+                if self._routes is None:
+                    self._routes = RouteTable(self.projects_dir, discover_projects(self.projects_dir))
+                routes = self._routes
+        return routes
+
+    @property
+    def projects(self):
+        return self.routes.projects
+
+    def refresh_projects(self):
+        """Vuelve a detectar los proyectos y, si cambiaron, reemplaza la tabla de rutas de una vez.
+
+        Cada request usa la tabla que tomó al empezar, así los que están en curso no se ven
+        afectados. Devuelve (proyectos agregados, proyectos quitados)."""
+        projects = discover_projects(self.projects_dir)
+        with self._routes_lock:
+            previous = self._routes.projects if self._routes is not None else []
+            if projects == previous:
+                return [], []
+            self._routes = RouteTable(self.projects_dir, projects)
+        added = [name for name in projects if name not in previous]
+        removed = [name for name in previous if name not in projects]
+        if added:
+            print(f"📂 Proyectos agregados: {', '.join(added)}", flush=True)
+        if removed:
+            print(f"📂 Proyectos quitados: {', '.join(removed)}", flush=True)
+        return added, removed
+
+    def _watch_roots(self):
+        """Proyectos, más el dist/ de las librerías compartidas que no son proyectos (p. ej. nrd-data-access)."""
+        projects = self.projects
+        roots = [self.projects_dir / project_name for project_name in projects]
+        roots += [self.projects_dir / name / 'dist' for name in DIST_LIBRARIES
+                  if name not in projects and (self.projects_dir / name / 'dist').is_dir()]
+        return roots
+
+    def start_watcher(self):
+        """Arranca (una sola vez) el thread del watcher: inotify si está disponible, si no polling."""
+        with self._watcher_lock:
+            if self._watcher_thread is None and not self.stopped.is_set():
+                self._watcher_thread = threading.Thread(target=self._live_reload_watcher,
+                                                        name='nrd-live-reload', daemon=True)
+                self._watcher_thread.start()
+
+    def ensure_watcher(self, timeout=WORKER_READY_TIMEOUT):
+        """Arranca el watcher si hace falta y espera su recorrido inicial (para no dar un seq provisorio)."""
+        self.start_watcher()
+        self.watcher_ready.wait(timeout)
+
+    def stop_live_streams(self):
+        """Despierta y cierra las conexiones SSE y el watcher."""
+        with self.live_changed:
+            self.stopped.set()
+            self.live_changed.notify_all()
+        inotify = self._inotify
+        if inotify is not None:
+            inotify.wake()
+
+    def close(self):
+        self.stop_live_streams()
+        thread = self._watcher_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(LIVE_RELOAD_POLL_INTERVAL + 1.0)
+        if self.access_log is not None:
+            self.access_log.close()
+
+    def _publish_changes(self, changes):
+        """Registra un lote de cambios [(path, mtime en µs o None)] y notifica una vez a las conexiones /_nrd_live."""
+        with self.live_changed:
+            self.live_changes.record(changes)
+            self.live_changed.notify_all()
+
+    def _notify_change(self, paths=None):
+        """Publica cambios detectados por inotify; paths None = no se sabe qué cambió (recarga completa)."""
+        changes = []
+        for path in (paths if paths is not None else [None]):
+            mtime = None
+            if path is not None:
+                try:
+                    mtime = os.stat(path).st_mtime_ns // 1000
+                except OSError:
+                    pass  # borrado o movido
+            changes.append((path, mtime))
+        self._publish_changes(changes)
+
+    def _update_watched_projects(self, watcher):
+        """Aplica altas y bajas de proyectos a la tabla de rutas y a los watches; devuelve los paths a notificar."""
+        added, removed = self.refresh_projects()
+        for project_name in removed:
+            root = str(self.projects_dir / project_name)
+            watcher.remove_tree(root)
+            if os.path.isdir(root):
+                watcher.add_dir(root)  # sigue siendo candidato: puede volver a tener index.html
+                if project_name in DIST_LIBRARIES and os.path.isdir(os.path.join(root, 'dist')):
+                    watcher.add_tree(os.path.join(root, 'dist'))
+        for project_name in added:
+            watcher.add_tree(str(self.projects_dir / project_name))
+        # Las pestañas abiertas del proyecto recargan (la app nueva, o el 404 si se quitó)
+        return [str(self.projects_dir / project_name / 'index.html') for project_name in added + removed]
+
+    def _watch_with_inotify(self, watcher):
+        """Bucle del watcher inotify: agrupa ráfagas de eventos y publica el cambio al instante.
+
+        projects_dir y los nrd-* sin index.html se vigilan sin recursión para detectar proyectos
+        nuevos, borrados o renombrados."""
+        top = str(self.projects_dir) + os.sep
+        while not self.stopped.is_set():
+            events = watcher.read_events()
+            changed = []
+            overflow = False
+            projects_changed = False
+            while events is None or events:
+                if events is None:
+                    # Cola desbordada: no sabemos qué cambió, se asume que algo cambió
+                    overflow = projects_changed = True
+                    self.asset_cache.clear()
+                    self.bundler.clear()
+                    self.routes.invalidate()
+                else:
+                    # Cualquier evento puede ser un symlink creado o redirigido: rehacer los realpath
+                    self.routes.invalidate()
+                    roots = self.routes.roots
+                    for path, mask in events:
+                        self.asset_cache.invalidate(path)
+                        self.bundler.invalidate(path)
+                        name = os.path.basename(path)
+                        first, _, rest = path[len(top):].partition(os.sep) if path.startswith(top) else ('', '', '')
+                        if first.startswith('nrd-') and rest in ('', 'index.html'):
+                            projects_changed = True  # puede haber aparecido o desaparecido un proyecto
+                        in_dist_library = first in DIST_LIBRARIES and (rest == 'dist' or rest.startswith('dist' + os.sep))
+                        if first not in roots and not in_dist_library:
+                            # projects_dir o un nrd-* que todavía no es proyecto (p. ej. un clone a medias)
+                            if (not rest and first.startswith('nrd-') and mask & watcher.IN_ISDIR
+                                    and mask & (watcher.IN_CREATE | watcher.IN_MOVED_TO)):
+                                watcher.add_dir(path)
+                            continue
+                        if mask & watcher.IN_ISDIR:
+                            if _is_ignored_dir(name, os.path.dirname(path)):
+                                continue
+                            if mask & (watcher.IN_CREATE | watcher.IN_MOVED_TO) and watcher.add_tree(path):
+                                changed.append(path)
+                            elif mask & (watcher.IN_DELETE | watcher.IN_MOVED_FROM):
+                                changed.append(path)
+                        elif _is_watched_file(name) and path not in changed:
+                            changed.append(path)
+                # Editores guardan con varias operaciones (temp + rename): agruparlas en una notificación
+                events = watcher.read_events(LIVE_RELOAD_DEBOUNCE)
+            if projects_changed:
+                changed += [path for path in self._update_watched_projects(watcher) if path not in changed]
+            if overflow:
+                self._notify_change(None)
+            elif changed:
+                self._notify_change(changed)
+
+    def _watch_with_polling(self, mtimes):
+        roots = self._watch_roots()
+        while not self.stopped.wait(LIVE_RELOAD_POLL_INTERVAL):
+            try:
+                added, removed = self.refresh_projects()
+                if added or removed:
+                    # Los archivos del proyecto nuevo (o quitado) salen en la diferencia como altas (o bajas)
+                    roots = self._watch_roots()
+                started = time.perf_counter()
+                current = _scan_mtimes(roots)
+                self.metrics.record_scan('poll', time.perf_counter() - started)
+                # Diferencia con el recorrido anterior: archivos nuevos, modificados y borrados
+                changes = [(path, mtime) for path, mtime in current.items() if mtimes.get(path) != mtime]
+                changes += [(path, None) for path in mtimes.keys() - current.keys()]
+                mtimes = current
+                # El recorrido no sigue symlinks ni ve los que cambian de destino: rehacer los realpath
+                self.routes.invalidate()
+                if changes:
+                    for path, _ in changes:
+                        self.asset_cache.invalidate(path)
+                        self.bundler.invalidate(path)
+                    self._publish_changes(changes)
             except Exception:
                 pass
 
+    def _live_reload_watcher(self):
+        """Thread que mantiene live_changes: recorrido inicial y luego inotify o polling hasta close()."""
+        roots = self._watch_roots()
+        watcher = None
+        if LIVE_RELOAD_BACKEND != 'poll':
+            # Los watches se registran antes del recorrido inicial: lo que cambie mientras tanto
+            # queda en la cola de inotify y no se pierde entre watcher_ready y el primer read
+            try:
+                started = time.perf_counter()
+                with profiling.phase('watcher scan'):
+                    watcher = _InotifyWatcher(roots)
+                    for candidate in [self.projects_dir] + [path for path in self.projects_dir.glob('nrd-*')
+                                                            if path.is_dir() and path.name not in self.routes.roots]:
+                        watcher.add_dir(str(candidate))
+                self.metrics.record_scan('inotify', time.perf_counter() - started)
+            except (OSError, AttributeError) as e:
+                watcher = None
+                if LIVE_RELOAD_BACKEND == 'inotify':
+                    print(f"⚠️  Live reload: inotify no disponible ({e}), usando polling")
+        self.metrics.set_backend('inotify' if watcher is not None else 'poll')
+        started = time.perf_counter()
+        try:
+            mtimes = _scan_mtimes(roots)
+            with self.live_changed:
+                self.live_changes.reset(max(mtimes.values(), default=0))
+            self.metrics.record_scan('initial', time.perf_counter() - started)
+        finally:
+            self.watcher_ready.set()
+        if watcher is not None:
+            mtimes = None  # con inotify no hace falta guardar el recorrido inicial
+            self._inotify = watcher
+            try:
+                if not self.stopped.is_set():
+                    self._watch_with_inotify(watcher)
+            except OSError as e:
+                print(f"⚠️  Live reload: error en inotify ({e}), usando polling")
+            finally:
+                self._inotify = None
+                watcher.close()
+        if not self.stopped.is_set():
+            self.metrics.set_backend('poll')
+            self._watch_with_polling(mtimes if mtimes is not None else _scan_mtimes(self._watch_roots()))
+
+def _load_update_version():
+    """Importa una sola vez la lógica de tools/update-version/update-version.py."""
+    script = script_dir.parent / "update-version" / "update-version.py"
+    spec = importlib.util.spec_from_file_location("nrd_update_version", script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.update_versions
+
+
+def _update_project_versions(projects_dir, projects):
+    """Actualiza la versión de todos los proyectos en paralelo (corre en segundo plano)."""
+    # Solo los proyectos que tienen la herramienta sincronizada (misma condición que antes)
+    targets = [name for name in projects
+               if (projects_dir / name / "tools" / "update-version" / "update-version.py").exists()]
+    if not targets:
+        return
+    try:
+        update_versions = _load_update_version()
+    except (OSError, ImportError, SyntaxError, AttributeError) as e:
+        print(f"⚠️  No se pudo cargar update-version.py: {e}")
+        return
+    started = time.perf_counter()
+    try:
+        # Solo escribe los archivos que cambian: si nada cambió, el live reload no se dispara
+        results = update_versions(targets, projects_dir=projects_dir, verbose=False, max_workers=8)
+    except Exception as e:
+        print(f"⚠️  Error actualizando versiones: {e}")
+        return
+    updated = sum(1 for version, _ in results.values() if version is not None)
+    changed = sum(1 for _, written in results.values() if written)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"📝 Versiones actualizadas: {updated}/{len(targets)} proyectos "
+          f"({changed} con cambios) en {elapsed_ms:.0f} ms", flush=True)
+
+
 # Handler personalizado que sirve múltiples proyectos
 class MultiProjectHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, projects_dir=None, projects=None, **kwargs):
-        self.projects_dir = projects_dir
-        self.projects = projects
-        super().__init__(*args, **kwargs)
-    
+    # Conexiones persistentes: todas las respuestas llevan Content-Length (o cierran la conexión)
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+    # Sin Nagle: headers y body van en escrituras separadas y el delayed ACK añadiría ~40 ms por respuesta
+    disable_nagle_algorithm = True
+
+    def __init__(self, request, client_address, server):
+        # Todo el estado sale del contexto del servidor; no hay globales ni os.chdir
+        self.handed_off = False  # la conexión quedó en espera (keep-alive inactiva) o en un thread propio (SSE)
+        self.streaming = False
+        self.context = server.context
+        self.projects_dir = self.context.projects_dir
+        self.production = self.context.production
+        self._use_current_routes()
+        super().__init__(request, client_address, server, directory=str(self.projects_dir))
+
+    def handle(self):
+        """Como BaseHTTPRequestHandler.handle, pero una conexión keep-alive inactiva no retiene el worker."""
+        self.close_connection = True
+        try:
+            self.handle_one_request()
+            while not self.close_connection:
+                if self._park_if_idle():
+                    return
+                self.handle_one_request()
+        except ConnectionResetError:
+            pass  # el cliente cerró una conexión keep-alive mientras esperaba
+
+    def _park_if_idle(self):
+        """Si no llegó el próximo request, deja la conexión esperándolo fuera del pool. True si la dejó."""
+        idle = getattr(self.server, 'idle_connections', None)
+        if idle is None:
+            return False
+        try:
+            # Sin bloquear: peek devuelve lo que ya está en el buffer (request en pipeline) o b''
+            self.connection.setblocking(False)
+            try:
+                pending = self.rfile.peek(1)
+            finally:
+                self.connection.settimeout(self.timeout)
+        except OSError:
+            return False
+        if pending or not idle.park(self.request, self.client_address):
+            return False
+        self.handed_off = True
+        return True
+
+    def _hand_off(self, target, *args):
+        """Sigue atendiendo la conexión en un thread propio (streams largos) y libera el worker del pool."""
+        self.close_connection = True
+        self.handed_off = self.streaming = True
+        threading.Thread(target=self._run_handed_off, args=(target,) + args,
+                         name='nrd-live-stream', daemon=True).start()
+
+    def _run_handed_off(self, target, *args):
+        try:
+            target(*args)
+        finally:
+            try:
+                super().finish()
+            except OSError:
+                pass
+            self.server.release_request(self.request)
+
+    def finish(self):
+        # Un stream en su propio thread cierra rfile/wfile al terminar (_run_handed_off)
+        if not self.streaming:
+            super().finish()
+
+    def _use_current_routes(self):
+        # Una conexión keep-alive atiende varios requests: cada uno toma la tabla vigente al empezar
+        self.routes = self.context.routes
+        self.projects = self.routes.projects
+
     def translate_path(self, path):
-        # Remover query string y fragment
+        # Remover query string y fragment; el resto lo resuelve la tabla de rutas
         path = path.split('?', 1)[0]
         path = path.split('#', 1)[0]
-        path = unquote(path)
-        
-        # Buscar si el path comienza con algún nombre de proyecto (incluyendo nrd-common y nrd-data-access)
-        for project_name in self.projects:
-            if path.startswith(f'/{project_name}/'):
-                # Remover el prefijo del proyecto
-                relative_path = path[len(f'/{project_name}/'):]
-                if not relative_path:
-                    relative_path = 'index.html'
-                project_root = self.projects_dir / project_name
-                full_path = project_root / relative_path
-                return str(full_path.resolve())
-            elif path == f'/{project_name}' or path == f'/{project_name}/':
-                project_root = self.projects_dir / project_name
-                return str((project_root / 'index.html').resolve())
-        
-        # Si el path comienza con /nrd-common/dist/ o /nrd-data-access/dist/, servir desde la raíz del servidor
-        # (para los archivos compilados de las librerías)
-        if path.startswith('/nrd-common/dist/') or path.startswith('/nrd-data-access/dist/'):
-            full_path = Path.cwd() / path.lstrip('/')
-            return str(full_path.resolve())
-        
-        # Si el path es solo /, mostrar lista de proyectos
-        if path == '/' or path == '':
-            return None  # Se manejará en do_GET
-        
-        # Para cualquier otro path, intentar servirlo desde el primer proyecto (fallback)
-        if not path.startswith('/'):
-            path = '/' + path
-        project_root = self.projects_dir / self.projects[0]
-        full_path = project_root / path.lstrip('/')
-        return str(full_path.resolve())
-    
+        return self.routes.resolve(unquote(path))
+
+    def _live_scope(self, query):
+        """(proyecto, since) de /_nrd_live?project=&since=; el proyecto solo si existe."""
+        params = parse_qs(query)
+        project = params.get('project', [None])[0]
+        if project not in self.routes.roots:
+            project = None
+        since = params.get('since', [None])[0]
+        # Al reconectar, EventSource manda el id del último evento recibido
+        since = self.headers.get('Last-Event-ID') or since
+        try:
+            since = int(since) if since is not None else None
+        except ValueError:
+            since = None
+        return project, since
+
+    def _serve_live_stream(self, project=None, since=None):
+        """/_nrd_live en modo Server-Sent Events: mantiene la conexión y envía un evento por cambio.
+
+        Con project solo se envían los cambios que afectan a ese proyecto (o a librerías compartidas).
+        """
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Connection', 'close')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        if getattr(self.server, 'idle_connections', None) is not None:
+            # Con pool, un stream abierto (una pestaña) no puede ocupar uno de sus workers fijos
+            self._hand_off(self._stream_live_events, project, since)
+        else:
+            self._stream_live_events(project, since)
+
+    def _stream_live_events(self, project, since):
+        context = self.context
+        changes = context.live_changes
+        last = None
+        try:
+            self.wfile.write(b'retry: 2000\n\n')
+            while not context.stopped.is_set():
+                with context.live_changed:
+                    if last is not None:
+                        context.live_changed.wait_for(
+                            lambda: changes.seq != last or context.stopped.is_set(),
+                            timeout=LIVE_RELOAD_HEARTBEAT)
+                    current = changes.seq
+                    event = changes.event(since if last is None else last, project) if current != last else None
+                if event is None:
+                    self.wfile.write(b': ping\n\n')
+                elif last is None or event['paths'] != []:
+                    # El primer evento informa el seq actual; después solo los cambios que afectan al alcance
+                    self.wfile.write(('id: %d\ndata: %s\n\n' % (
+                        current, json.dumps(event, separators=(',', ':')))).encode('utf-8'))
+                last = current
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError, OSError):
+            return
+
+    def _read_cached(self, path, st, variant='', transform=None):
+        """Devuelve el contenido de path desde la caché, leyéndolo (y transformándolo) si hace falta."""
+        content = self.context.asset_cache.get(path, st, variant)
+        self._cache_hit = content is not None
+        if content is None:
+            with open(path, 'rb') as f:
+                content = f.read()
+            if transform is not None:
+                content = transform(content)
+            self.context.asset_cache.put(path, st, content, variant)
+        return content
+
+    @staticmethod
+    def _gzip_sibling(path, st):
+        """stat de path.gz si existe y está al día con path (st); si no, None."""
+        try:
+            gz_st = os.stat(path + '.gz')
+        except OSError:
+            return None
+        if stat.S_ISREG(gz_st.st_mode) and gz_st.st_mtime_ns >= st.st_mtime_ns:
+            return gz_st
+        return None
+
+    def _read_gzip(self, path, st, variant='', transform=None):
+        """Contenido comprimido con gzip: usa path.gz si existe y está al día, si no comprime una vez y cachea."""
+        if transform is None:
+            gz_st = self._gzip_sibling(path, st)
+            if gz_st is not None:
+                return self._read_cached(path + '.gz', gz_st)
+
+        def compress(content):
+            if transform is not None:
+                content = transform(content)
+            return gzip.compress(content, GZIP_LEVEL, mtime=0)
+
+        return self._read_cached(path, st, variant + '.gz', compress)
+
+    def _accepts_gzip(self):
+        for part in self.headers.get('Accept-Encoding', '').split(','):
+            coding, _, params = part.partition(';')
+            if coding.strip().lower() in ('gzip', '*'):
+                params = params.replace(' ', '')
+                if params.startswith('q='):
+                    try:
+                        return float(params[2:]) > 0
+                    except ValueError:
+                        return False
+                return True
+        return False
+
+    def _cache_control_for(self, path):
+        """Cache-Control de un archivo: en producción, URLs con ?v= son inmutables salvo HTML y version.json."""
+        if self.production:
+            name = os.path.basename(path).lower()
+            if not name.endswith('.html') and name != 'version.json' and 'v' in parse_qs(urlsplit(self.path).query):
+                return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        # no-cache obliga a revalidar, lo que permite responder 304 con ETag / Last-Modified
+        return 'no-cache'
+
+    def _not_modified(self, etag, mtime):
+        """Evalúa If-None-Match (o If-Modified-Since si no viene) contra el ETag / mtime actuales."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return etag in tags or f'W/{etag}' in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since is not None and since.tzinfo is not None:
+                return int(mtime) <= since.timestamp()
+        return False
+
+    def _requested_range(self, size, etag, st):
+        """Rango único pedido en Range: (inicio, fin), None para responder completo o RANGE_NOT_SATISFIABLE."""
+        header = self.headers.get('Range')
+        if not header or self.command != 'GET':
+            return None
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range.strip() not in (etag, self.date_time_string(st.st_mtime)):
+            return None  # el cliente tiene otra versión: enviar el archivo completo
+        unit, _, spec = header.partition('=')
+        if unit.strip().lower() != 'bytes' or ',' in spec:
+            return None  # multi-rango no soportado: 200 con el archivo completo
+        first, sep, last = spec.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix <= 0:
+                    return RANGE_NOT_SATISFIABLE
+                start, end = max(0, size - suffix), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else None
+                if end is not None and end < start:
+                    return None
+                if start >= size:
+                    return RANGE_NOT_SATISFIABLE
+                end = size - 1 if end is None else min(end, size - 1)
+        except ValueError:
+            return None
+        if size == 0:
+            return RANGE_NOT_SATISFIABLE
+        return start, end
+
+    def _sendfile(self, f, offset, count):
+        # socket.sendfile usa os.sendfile (zero-copy) si está disponible y si no cae a send()
+        self.wfile.flush()
+        self.connection.sendfile(f, offset, count)
+
+    def _send_file_response(self, path, st, size, content_type, etag_suffix, write_body, encoding=None, vary=False):
+        """Responde 200/206/304/416 para un archivo; write_body(inicio, cantidad) envía los bytes."""
+        etag = '"%x-%x%s"' % (st.st_mtime_ns, st.st_size, etag_suffix)
+        cache_control = self._cache_control_for(path)
+        if self._not_modified(etag, st.st_mtime):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            if vary:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        byte_range = self._requested_range(size, etag, st) if encoding is None else None
+        if byte_range is RANGE_NOT_SATISFIABLE:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        count = end - start + 1
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if vary:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Accept-Ranges', 'bytes')
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(count))
+        self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.end_headers()
+        if self.command != 'HEAD' and count > 0:
+            write_body(start, count)
+
     def do_GET(self):
-        # Endpoint para live reload (polling)
-        path_for_live = self.path.split('?', 1)[0]
+        started = time.perf_counter()
+        self._use_current_routes()
+        self._route = 'other'
+        self._status = 0
+        self._sent_bytes = 0
+        self._cache_hit = None
+        try:
+            self._handle_get()
+        finally:
+            elapsed = time.perf_counter() - started
+            first = self.path.split('?', 1)[0].lstrip('/').split('/', 1)[0]
+            project = first if first in self.routes.roots else '-'
+            sent_bytes = self._sent_bytes if self.command != 'HEAD' else 0
+            self.context.metrics.observe(self._route, project, self._status, sent_bytes, elapsed, self._cache_hit)
+            if self.context.access_log is not None:
+                self.context.access_log.write({
+                    'ts': round(time.time(), 3), 'client': self.client_address[0], 'method': self.command,
+                    'path': self.path, 'status': self._status, 'bytes': sent_bytes,
+                    'ms': round(elapsed * 1000, 3), 'route': self._route, 'project': project,
+                    'cache': self._cache_hit,
+                })
+
+    def _serve_bundle(self, path, kind):
+        """Responde el bundle de la entrada path (o su source map si kind es 'map').
+
+        Devuelve False si la entrada no se pudo empaquetar: entonces se sirve el archivo tal cual."""
+        bundle = self.context.bundler.get(self.routes, unquote(path))
+        if bundle is None or bundle.error is not None:
+            return False
+        self._route = 'bundle'
+        is_map = kind == 'map'
+        body = bundle.source_map if is_map else bundle.code
+        content_type = 'application/json; charset=utf-8' if is_map else 'text/javascript; charset=utf-8'
+        encoding = 'gzip' if len(body) >= GZIP_MIN_SIZE and self._accepts_gzip() else None
+        if encoding:
+            body = bundle.gzipped('map' if is_map else 'code')
+        etag = '"%s%s%s"' % (bundle.etag, '-map' if is_map else '', '-gz' if encoding else '')
+        # Sin ?v=: la versión de la entrada no cubre a sus dependencias, siempre se revalida
+        if self._not_modified(etag, bundle.mtime):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return True
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        return True
+
+    def _serve_metrics(self):
+        query = parse_qs(urlsplit(self.path).query)
+        if query.get('format', [''])[0] == 'prometheus' or 'text/plain' in self.headers.get('Accept', ''):
+            body = self.context.metrics.to_prometheus().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = json.dumps(self.context.metrics.snapshot(), indent=2).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _handle_get(self):
+        # Endpoint para live reload: streaming SSE (?stream=1) o polling
+        path_for_live, _, query_for_live = self.path.partition('?')
+        if path_for_live == '/_nrd_metrics':
+            self._route = 'metrics'
+            self._serve_metrics()
+            return
         if path_for_live == '/_nrd_live':
+            project, since = self._live_scope(query_for_live)
+            # El watcher arranca con el primer cliente de live reload (si no se arrancó antes)
+            self.context.ensure_watcher()
+            if 'stream=1' in query_for_live.split('&') or 'text/event-stream' in self.headers.get('Accept', ''):
+                self._route = 'live-stream'
+                self._serve_live_stream(project, since)
+                return
+            self._route = 'live'
+            with self.context.live_changed:
+                event = self.context.live_changes.event(since, project)
+            body = json.dumps(event, separators=(',', ':')).encode('utf-8')
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            body = ('{"t":%s}' % LIVE_RELOAD_LAST_MTIME[0]).encode('utf-8')
-            self.wfile.write(body)
+            if self.command != 'HEAD':
+                self.wfile.write(body)
             return
 
         # Si el path es /, mostrar lista de proyectos
         if self.path == '/' or self.path == '':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.end_headers()
-            
+            self._route = 'index'
             html = '''<!DOCTYPE html>
 <html lang="es">
 <head>
@@ -210,96 +1838,679 @@ class MultiProjectHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             html += '''    </div>
 </body>
 </html>'''
-            self.wfile.write(html.encode('utf-8'))
+            body = html.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html; charset=utf-8')
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body)
             return
 
-        # Para HTML: inyectar script de live reload antes de </body>
-        path_clean = self.path.split('?', 1)[0]
-        translated = self.translate_path(path_clean)
-        if translated and os.path.isfile(translated) and translated.lower().endswith('.html'):
-            try:
-                with open(translated, 'rb') as f:
-                    content = f.read()
-                marker = b'</body>'
-                if marker in content:
-                    script = b'''<script>(function(){
-var last=0;function check(){fetch("/_nrd_live").then(function(r){return r.json();}).then(function(d){
-if(d.t&&d.t!==last){if(last>0)location.reload();last=d.t;}
-}).catch(function(){});}
-setInterval(check,1500);check();
-})();</script>'''
-                    content = content.replace(marker, script + marker, 1)
-                self.send_response(200)
-                self.send_header('Content-Type', 'text/html; charset=utf-8')
-                self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate, max-age=0')
-                self.send_header('Pragma', 'no-cache')
-                self.send_header('Expires', '0')
-                self.send_header('Content-Length', str(len(content)))
-                self.end_headers()
-                self.wfile.write(content)
+        # Módulo ES empaquetado con sus dependencias (?bundle) o su source map (?bundle=map)
+        path_clean, _, query = self.path.partition('?')
+        if query and path_clean.endswith(BUNDLE_EXTENSIONS):
+            kind = parse_qs(query, keep_blank_values=True).get('bundle', [None])[0]
+            if kind is not None and self._serve_bundle(path_clean, kind):
                 return
-            except (OSError, IOError):
-                pass
 
-        # Llamar al método padre para manejar otros paths
-        super().do_GET()
+        # Archivos regulares: servir desde la caché en memoria (HTML con live reload ya inyectado)
+        translated = self.translate_path(path_clean)
+        if translated is None:
+            self.send_error(404, "File not found")
+            return
+        try:
+            st = os.stat(translated)
+        except OSError:
+            st = None
+        if st is not None and stat.S_ISREG(st.st_mode):
+            is_html = translated.lower().endswith('.html')
+            if is_html:
+                content_type, variant, transform = 'text/html; charset=utf-8', 'html', _inject_live_reload
+            else:
+                content_type, variant, transform = self.guess_type(translated), '', None
+            if is_html or st.st_size <= self.context.asset_cache.max_entry_bytes:
+                compressible = _is_compressible(content_type) and st.st_size >= GZIP_MIN_SIZE
+                # Los rangos se sirven sobre la representación sin comprimir
+                wants_range = self.command == 'GET' and 'Range' in self.headers
+                encoding = 'gzip' if compressible and not wants_range and self._accepts_gzip() else None
+                try:
+                    if encoding:
+                        content = self._read_gzip(translated, st, variant, transform)
+                    else:
+                        content = self._read_cached(translated, st, variant, transform)
+                except OSError:
+                    content = None
+                if content is not None:
+                    self._route = 'html' if is_html else 'asset'
+                    etag_suffix = (LIVE_RELOAD_ETAG_SUFFIX if is_html else '') + ('-gz' if encoding else '')
+                    body = memoryview(content)
+                    self._send_file_response(translated, st, len(content), content_type, etag_suffix,
+                                             lambda start, count: self.wfile.write(body[start:start + count]),
+                                             encoding=encoding, vary=compressible)
+                    return
+            else:
+                # Archivos grandes: fuera de la caché, se envían con sendfile (sin copiar por Python).
+                # Con gzip se manda el hermano .gz ya comprimido si está al día (no se comprime al vuelo)
+                compressible = _is_compressible(content_type)
+                wants_range = self.command == 'GET' and 'Range' in self.headers
+                gz_st = None
+                if compressible and not wants_range and self._accepts_gzip():
+                    gz_st = self._gzip_sibling(translated, st)
+                try:
+                    f = open(translated + '.gz' if gz_st is not None else translated, 'rb')
+                except OSError:
+                    f = None
+                if f is not None:
+                    self._route = 'file'
+                    with f:
+                        size = os.fstat(f.fileno()).st_size
+                        if gz_st is None:
+                            st = os.fstat(f.fileno())
+                        self._send_file_response(translated, st, size, content_type, '-gz' if gz_st else '',
+                                                 lambda start, count: self._sendfile(f, start, count),
+                                                 encoding='gzip' if gz_st else None, vary=compressible)
+                    return
+
+        # Directorios y paths inexistentes: lo maneja el método padre (redirect, listado, 404)
+        if self.command == 'HEAD':
+            super().do_HEAD()
+        else:
+            super().do_GET()
     
+    def do_HEAD(self):
+        # Mismo enrutado que GET; las respuestas desde memoria omiten el body en HEAD
+        self.do_GET()
+
+    def send_response(self, code, message=None):
+        self._cache_control_sent = False
+        self._status = code
+        super().send_response(code, message)
+        if getattr(self.server, 'draining', False) and not self.close_connection:
+            # Worker en recarga: esta es la última respuesta de la conexión; el cliente reconecta a un worker nuevo
+            self.send_header('Connection', 'close')
+
+    def send_header(self, keyword, value):
+        keyword_lower = keyword.lower()
+        if keyword_lower == 'cache-control':
+            self._cache_control_sent = True
+        elif keyword_lower == 'content-length':
+            self._sent_bytes = getattr(self, '_sent_bytes', 0) + int(value)
+        super().send_header(keyword, value)
+
+    def log_request(self, code='-', size='-'):
+        # Con access log estructurado no se escribe además una línea por request en stderr
+        if self.context.access_log is None:
+            super().log_request(code, size)
+
     def end_headers(self):
-        # Headers para evitar cache en desarrollo
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate, max-age=0')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        # Respuestas sin política propia (errores, redirecciones, listados, archivos grandes): revalidar siempre
+        if not getattr(self, '_cache_control_sent', False):
+            self.send_header('Cache-Control', 'no-cache')
         super().end_headers()
 
-# Cambiar al directorio padre (projects_dir) para servir desde ahí
-os.chdir(projects_dir)
-
-# Crear handler con todos los proyectos
-def handler_factory(projects_dir, projects):
-    def create_handler(*args, **kwargs):
-        return MultiProjectHTTPRequestHandler(*args, projects_dir=projects_dir, projects=projects, **kwargs)
-    return create_handler
-
-Handler = handler_factory(projects_dir, projects)
-
-try:
-    with socketserver.TCPServer(("", port), Handler) as httpd:
-        print(f"🚀 Servidor HTTP iniciado para todos los proyectos NRD")
-        print(f"   Directorio base: {projects_dir}")
-        print(f"   Puerto: {port}")
-        print(f"   Proyectos disponibles:")
-        for project in projects:
-            print(f"      - http://localhost:{port}/{project}/")
-        print(f"   Página principal: http://localhost:{port}/")
-        print(f"   Live reload: activo (cambios en .html, .js, .css, .json recargan la página)")
-        print(f"   Presiona Ctrl+C para detener")
-        
-        # Iniciar servidor
-        httpd.serve_forever()
-except PermissionError as e:
-    if port < 1024:
-        print(f"❌ Error: Se requieren permisos de administrador para usar el puerto {port}")
-        print(f"   Ejecuta con sudo: sudo ./restart.sh {port}")
-        print(f"   O usa un puerto mayor a 1024: ./restart.sh 8006")
-    else:
-        print(f"❌ Error de permisos: {e}")
-    sys.exit(1)
-except OSError as e:
-    if "Address already in use" in str(e):
-        print(f"⚠️  El puerto {port} ya está en uso")
-        print(f"   Accede a: http://localhost:{port}/")
-    elif "Permission denied" in str(e) or "Operation not permitted" in str(e):
-        print(f"❌ Error: Se requieren permisos de administrador para usar el puerto {port}")
-        print(f"   Ejecuta con sudo: sudo ./restart.sh {port}")
-        print(f"   O usa un puerto mayor a 1024: ./restart.sh 8006")
-    else:
-        print(f"❌ Error: {e}")
-    sys.exit(1)
-except KeyboardInterrupt:
+
+
+class _IdleConnections:
+    """Conexiones keep-alive inactivas esperando su próximo request sin ocupar un worker del pool.
+
+    Un thread con selector las vigila: cuando llega un request (o el cliente cierra) la conexión
+    vuelve al pool, y si pasa KEEP_ALIVE_TIMEOUT sin actividad se cierra.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self._selector = selectors.DefaultSelector()
+        self._pending = []
+        self._deadlines = {}  # socket -> momento (monotonic) en que se cierra por inactividad
+        self._lock = threading.Lock()
+        self._closed = False
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name='nrd-keep-alive', daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending) + len(self._deadlines)
+
+    def park(self, request, client_address):
+        """Deja la conexión en espera. False si ya no se aceptan (servidor cerrando o drenando)."""
+        with self._lock:
+            if self._closed:
+                return False
+            self._pending.append((request, client_address))
+        self._wake()
+        return True
+
+    def _wake(self):
+        try:
+            os.write(self._wake_write, b'x')
+        except OSError:
+            pass  # pipe lleno: el thread ya tiene un aviso pendiente
+
+    def _run(self):
+        while True:
+            with self._lock:
+                closed = self._closed
+                pending, self._pending = self._pending, []
+            if closed:
+                break
+            now = time.monotonic()
+            for request, client_address in pending:
+                try:
+                    self._selector.register(request, selectors.EVENT_READ, client_address)
+                    self._deadlines[request] = now + KEEP_ALIVE_TIMEOUT
+                except (ValueError, OSError):
+                    self.server.shutdown_request(request)
+            timeout = max(0.0, min(self._deadlines.values()) - now) if self._deadlines else None
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj == self._wake_read:
+                    try:
+                        while os.read(self._wake_read, 4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                self._selector.unregister(key.fileobj)
+                del self._deadlines[key.fileobj]
+                self.server.resume_request(key.fileobj, key.data)
+            now = time.monotonic()
+            for request, deadline in list(self._deadlines.items()):
+                if deadline <= now:
+                    self._selector.unregister(request)
+                    del self._deadlines[request]
+                    self.server.shutdown_request(request)
+        # Cierre: las conexiones en espera no tienen ningún request en curso
+        for request in list(self._deadlines) + [request for request, _ in pending]:
+            self.server.shutdown_request(request)
+        self._deadlines.clear()
+        self._selector.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class NRDHTTPServer(socketserver.ThreadingTCPServer):
+    """Servidor concurrente: pool de workers, o un thread por conexión si workers=0.
+
+    Con pool, los workers solo se ocupan mientras hay un request en curso: entre requests las
+    conexiones keep-alive esperan en _IdleConnections (hasta KEEP_ALIVE_TIMEOUT) y cada stream SSE
+    de /_nrd_live corre en un thread propio, así las pestañas abiertas no agotan el pool.
+    El estado (rutas, caché, métricas, live reload) vive en context; server_close() lo cierra.
+    """
+    daemon_threads = True
+    request_queue_size = 128  # backlog de listen(): las cargas en frío abren muchas conexiones a la vez
+
+    def __init__(self, server_address, context, workers=0, bind_and_activate=True):
+        self.context = context
+        self._executor = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix='nrd-http')
+                          if workers > 0 else None)
+        self.idle_connections = _IdleConnections(self) if workers > 0 else None
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._serve_thread = None
+        self.draining = False
+        super().__init__(server_address, MultiProjectHTTPRequestHandler, bind_and_activate)
+
+    @classmethod
+    def from_inherited_fd(cls, fd, context, workers=0):
+        """Servidor sobre un socket de escucha heredado del proceso maestro (modo pre-fork)."""
+        listen_socket = socket.socket(fileno=fd)
+        server = cls(listen_socket.getsockname()[:2], context, workers=workers, bind_and_activate=False)
+        server.socket.close()
+        server.socket = listen_socket
+        return server
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def serve(self, poll_interval=0.5):
+        """Atiende requests en el thread actual hasta shutdown() (o stop() desde otro thread)."""
+        self.serve_forever(poll_interval)
+
+    def start(self, poll_interval=0.1):
+        """Atiende requests en un thread de fondo (tests, benchmarks). Devuelve el servidor."""
+        if self._serve_thread is None:
+            self._serve_thread = threading.Thread(target=self.serve, args=(poll_interval,),
+                                                  name='nrd-serve', daemon=True)
+            self._serve_thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor arrancado con start(): deja de aceptar, cierra conexiones, watcher y access log."""
+        if self._serve_thread is not None:
+            self.shutdown()
+            self._serve_thread.join()
+            self._serve_thread = None
+        self.server_close()
+
+    def process_request(self, request, client_address):
+        if self._executor is None:
+            super().process_request(request, client_address)
+        else:
+            self._executor.submit(self.process_request_thread, request, client_address)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def process_request_thread(self, request, client_address):
+        with self._active_lock:
+            self._active.add(request)
+        handler = None
+        try:
+            handler = self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if handler is None or not handler.handed_off:
+                self.release_request(request)
+            elif not handler.streaming:
+                # En espera del próximo request: no hay nada en curso que drain() deba esperar
+                with self._active_lock:
+                    self._active.discard(request)
+
+    def resume_request(self, request, client_address):
+        """Una conexión en espera recibió datos: vuelve al pool para atender el próximo request."""
+        try:
+            self._executor.submit(self.process_request_thread, request, client_address)
+        except RuntimeError:
+            self.shutdown_request(request)  # pool cerrado
+
+    def release_request(self, request):
+        """Termina una conexión (al acabar su último request, o su stream en un thread propio)."""
+        with self._active_lock:
+            self._active.discard(request)
+        self.shutdown_request(request)
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Termina las conexiones en curso sin cortar respuestas (llamar con serve_forever ya detenido).
+
+        Las conexiones inactivas se cierran por lectura (el request que se está respondiendo
+        sigue escribiendo) y las activas cierran al terminar su respuesta (Connection: close).
+        Devuelve cuántas conexiones quedaban al vencer el timeout."""
+        self.draining = True
+        self.context.stop_live_streams()
+        if self.idle_connections is not None:
+            self.idle_connections.close()
+        with self._active_lock:
+            active = list(self._active)
+        for request in active:
+            try:
+                request.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._active_lock:
+                if not self._active:
+                    return 0
+            time.sleep(0.05)
+        with self._active_lock:
+            return len(self._active)
+
+    def server_close(self):
+        super().server_close()
+        # Despertar streams SSE y cortar conexiones keep-alive inactivas para no esperar su timeout
+        self.context.stop_live_streams()
+        if self.idle_connections is not None:
+            self.idle_connections.close()
+        with self._active_lock:
+            for request in self._active:
+                try:
+                    request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.context.close()
+
+
+def create_server(projects_dir, port=0, host='', workers=SERVER_WORKERS, production=False, access_log=None):
+    """Crea un servidor NRD escuchando en (host, port) sin empezar a atender requests.
+
+    port=0 elige un puerto libre (ver server.port). Solo abre el socket: los proyectos se
+    detectan en el primer request y el watcher de live reload arranca con el primer cliente
+    de /_nrd_live. Se atiende con server.serve() o server.start(); server.stop() lo cierra.
+    """
+    context = ServerContext(projects_dir, production=production, access_log=access_log)
+    try:
+        return NRDHTTPServer((host, port), context, workers=workers)
+    except BaseException:
+        context.close()
+        raise
+
+
+class PreforkSupervisor:
+    """Proceso maestro del modo --processes: tiene el socket de escucha y supervisa a los workers.
+
+    Los workers son procesos nuevos de este mismo script (así una recarga toma el código y los
+    proyectos actuales) que reciben el fd del socket; el kernel reparte las conexiones entre ellos.
+    SIGHUP: corre on_reload (versionar los proyectos), arranca una generación nueva de workers,
+    espera a que estén escuchando y recién entonces manda SIGTERM a los viejos, que dejan de
+    aceptar y drenan sus conexiones.
+    """
+
+    def __init__(self, listen_socket, processes, worker_args, on_reload=None):
+        self.listen_socket = listen_socket
+        self.processes = processes
+        self.worker_args = worker_args
+        self.on_reload = on_reload
+        self.workers = []
+        self.retiring = []  # workers viejos drenando tras una recarga
+        self._reload_requested = False
+        self._stop_requested = False
+
+    def _spawn(self):
+        """Lanza un worker; devuelve (proceso, fd de lectura del pipe de 'listo')."""
+        ready_read, ready_write = os.pipe()
+        fd = self.listen_socket.fileno()
+        port = self.listen_socket.getsockname()[1]
+        command = [sys.executable, str(Path(__file__).resolve()), str(port),
+                   '--worker-fd', str(fd), '--ready-fd', str(ready_write)] + self.worker_args
+        try:
+            process = subprocess.Popen(command, pass_fds=(fd, ready_write))
+        finally:
+            os.close(ready_write)
+        return process, ready_read
+
+    def _wait_ready(self, process, ready_read):
+        """True si el worker avisó que está listo antes de WORKER_READY_TIMEOUT."""
+        try:
+            deadline = time.monotonic() + WORKER_READY_TIMEOUT
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                try:
+                    readable, _, _ = select.select([ready_read], [], [], remaining)
+                except InterruptedError:
+                    continue
+                if readable:
+                    return os.read(ready_read, 1) == b'1'  # b'' = el worker murió antes de arrancar
+        finally:
+            os.close(ready_read)
+
+    def _start_generation(self):
+        """Arranca self.processes workers. Devuelve la lista si todos quedaron listos, si no None."""
+        spawned = [self._spawn() for _ in range(self.processes)]
+        ready = [self._wait_ready(process, ready_read) for process, ready_read in spawned]
+        processes = [process for process, _ in spawned]
+        if all(ready):
+            return processes
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        return None
+
+    def _signal_workers(self, workers, signum):
+        for process in workers:
+            if process.poll() is None:
+                try:
+                    process.send_signal(signum)
+                except OSError:
+                    pass
+
+    def reload(self):
+        if self.on_reload is not None:
+            # En el maestro y antes de los workers nuevos: arrancan sirviendo las versiones actuales
+            self.on_reload()
+        new_workers = self._start_generation()
+        if new_workers is None:
+            print("❌ Recarga cancelada: los workers nuevos no arrancaron (siguen los actuales)", flush=True)
+            return
+        old_workers, self.workers = self.workers, new_workers
+        self._signal_workers(old_workers, signal.SIGTERM)
+        self.retiring.extend(old_workers)
+        print(f"🔄 Recargado: {len(new_workers)} workers nuevos, {len(old_workers)} drenando", flush=True)
+
+    def _reap(self):
+        self.retiring = [process for process in self.retiring if process.poll() is None]
+        for i, process in enumerate(self.workers):
+            if process.poll() is not None and not self._stop_requested:
+                print(f"⚠️  Worker {process.pid} terminó (código {process.returncode}), reiniciando...", flush=True)
+                time.sleep(WORKER_RESPAWN_DELAY)
+                replacement = self._start_generation_of_one()
+                if replacement is not None:
+                    self.workers[i] = replacement
+
+    def _start_generation_of_one(self):
+        process, ready_read = self._spawn()
+        if self._wait_ready(process, ready_read):
+            return process
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        return None
+
+    def stop(self):
+        everyone = self.workers + self.retiring
+        self._signal_workers(everyone, signal.SIGTERM)
+        deadline = time.monotonic() + DRAIN_TIMEOUT + 5
+        for process in everyone:
+            try:
+                process.wait(timeout=max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.listen_socket.close()
+
+    def run(self):
+        def request_reload(signum, frame):
+            self._reload_requested = True
+
+        def request_stop(signum, frame):
+            self._stop_requested = True
+
+        signal.signal(signal.SIGHUP, request_reload)
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        workers = self._start_generation()
+        if workers is None:
+            raise RuntimeError("los workers no arrancaron (revisa el log)")
+        self.workers = workers
+        try:
+            while not self._stop_requested:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self.reload()
+                self._reap()
+                time.sleep(0.2)
+        finally:
+            self.stop()
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP para todos los proyectos NRD")
+    parser.add_argument('port', nargs='?', type=int, default=80, help="puerto (por defecto 80)")
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS,
+                        help="tamaño del pool de workers; 0 = un thread por conexión (env NRD_SERVER_WORKERS)")
+    parser.add_argument('--production', action='store_true', default=SERVER_MODE == 'production',
+                        help="cachear assets versionados (?v=) como inmutables (env NRD_SERVER_MODE=production)")
+    parser.add_argument('--access-log', default=os.environ.get('NRD_ACCESS_LOG'),
+                        help="archivo de access log estructurado (JSON por línea, con buffer) (env NRD_ACCESS_LOG)")
+    parser.add_argument('--projects-dir', default=os.environ.get('NRD_PROJECTS_DIR'),
+                        help="directorio con los proyectos nrd-* (por defecto, el padre de nrd-common)")
+    parser.add_argument('--processes', type=int, default=SERVER_PROCESSES,
+                        help="procesos worker con socket compartido; SIGHUP recarga sin cortes (env NRD_SERVER_PROCESSES)")
+    parser.add_argument('--pid-file',
+                        help="pid del proceso maestro en modo --processes (por defecto /tmp/nrd-server-PUERTO.pid)")
+    profiling.add_arguments(parser)
+    # Uso interno: el maestro lanza cada worker con el fd del socket heredado y un pipe para avisar que está listo
+    parser.add_argument('--worker-fd', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--ready-fd', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.projects_dir = Path(args.projects_dir).resolve() if args.projects_dir else DEFAULT_PROJECTS_DIR
+    return args
+
+
+def _worker_args(args):
+    """Opciones del maestro que se pasan a cada worker."""
+    worker_args = ['--workers', str(args.workers), '--projects-dir', str(args.projects_dir)]
+    if args.production:
+        worker_args.append('--production')
+    if args.access_log:
+        worker_args += ['--access-log', args.access_log]
+    if profiling.PROFILER.enabled:
+        worker_args.append('--profile')
+    if profiling.PROFILER.stats_path:
+        # Un archivo de cProfile por worker (si no, todos escribirían el mismo al terminar)
+        worker_args += ['--profile-out', f'{profiling.PROFILER.stats_path}.worker-{{pid}}']
+    return worker_args
+
+
+def _print_banner(args, projects, concurrency):
+    port = args.port
+    print(f"🚀 Servidor HTTP iniciado para todos los proyectos NRD")
+    print(f"   Directorio base: {args.projects_dir}")
+    print(f"   Puerto: {port}")
+    print(f"   Modo: {'producción (assets ?v= inmutables)' if args.production else 'desarrollo'}")
+    print(f"   Concurrencia: {concurrency}, HTTP/1.1 keep-alive")
+    print(f"   Proyectos disponibles:")
+    for project in projects:
+        print(f"      - http://localhost:{port}/{project}/")
+    print(f"   Página principal: http://localhost:{port}/ (proyectos nuevos se detectan solos)")
+    print(f"   Métricas: http://localhost:{port}/_nrd_metrics")
+    if args.access_log:
+        print(f"   Access log: {args.access_log}")
+    print(f"   Live reload: activo (.html, .js, .json recargan las pestañas del proyecto; .css se aplica en caliente)")
+    print(f"   Presiona Ctrl+C para detener", flush=True)
+
+
+def _run_worker(args):
+    """Worker del modo pre-fork: sirve sobre el socket heredado hasta SIGTERM y luego drena."""
+    context = ServerContext(args.projects_dir, production=args.production, access_log=args.access_log)
+    httpd = NRDHTTPServer.from_inherited_fd(args.worker_fd, context, workers=args.workers)
+    parent_pid = os.getppid()
+
+    def begin_drain(*_):
+        # serve_forever corre en este thread: shutdown() tiene que llamarse desde otro
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    def watch_parent():
+        # Si el maestro muere (kill -9), el worker no debe quedar huérfano sirviendo
+        while os.getppid() == parent_pid:
+            time.sleep(1.0)
+        begin_drain()
+
+    signal.signal(signal.SIGTERM, begin_drain)
+    signal.signal(signal.SIGINT, begin_drain)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)  # la recarga la coordina el maestro
+    threading.Thread(target=watch_parent, daemon=True).start()
+    context.start_watcher()
+    if args.ready_fd is not None:
+        os.write(args.ready_fd, b'1')
+        os.close(args.ready_fd)
+    try:
+        httpd.serve()
+        pending = httpd.drain()
+        if pending:
+            print(f"⚠️  Worker {os.getpid()}: {pending} conexiones cortadas tras {DRAIN_TIMEOUT:.0f} s de drenado")
+    finally:
+        httpd.server_close()
+
+
+def _run_prefork(args, projects):
+    """Maestro del modo pre-fork: abre el socket, versiona los proyectos y supervisa a los workers."""
+    pid_file = Path(args.pid_file or f"/tmp/nrd-server-{args.port}.pid")
+    listen_socket = socket.create_server(("", args.port), backlog=NRDHTTPServer.request_queue_size)
+    try:
+        threading.Thread(target=_update_project_versions, args=(args.projects_dir, projects),
+                         name='nrd-version', daemon=True).start()
+        supervisor = PreforkSupervisor(
+            listen_socket, args.processes, _worker_args(args),
+            on_reload=lambda: _update_project_versions(args.projects_dir, discover_projects(args.projects_dir)))
+        pid_file.write_text(f"{os.getpid()}\n")
+        try:
+            _print_banner(args, projects, f"{args.processes} procesos × "
+                          f"{f'pool de {args.workers} workers' if args.workers > 0 else 'un thread por conexión'}")
+            print(f"   PID maestro: {os.getpid()} ({pid_file}); recarga sin cortes: kill -HUP {os.getpid()}", flush=True)
+            supervisor.run()
+        finally:
+            try:
+                pid_file.unlink()
+            except OSError:
+                pass
+    finally:
+        listen_socket.close()
     print("\n🛑 Servidor detenido")
-    sys.exit(0)
-except Exception as e:
-    print(f"❌ Error inesperado: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+
+
+def _run_single(args, projects):
+    with create_server(args.projects_dir, args.port, workers=args.workers,
+                       production=args.production, access_log=args.access_log) as httpd:
+        httpd.context.start_watcher()
+        # El socket ya está escuchando: el versionado corre en segundo plano sin demorar el arranque
+        threading.Thread(target=_update_project_versions, args=(args.projects_dir, projects),
+                         name='nrd-version', daemon=True).start()
+        _print_banner(args, projects, f'pool de {args.workers} workers' if args.workers > 0 else 'un thread por conexión')
+        if profiling.PROFILER.enabled:
+            # server-toggle.sh detiene con SIGTERM: salir por el camino normal para imprimir el perfil
+            signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=httpd.shutdown, daemon=True).start())
+
+        # Iniciar servidor
+        httpd.serve()
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    port = args.port
+    profiler = profiling.configure_from_args(args, 'worker del servidor' if args.worker_fd is not None else 'servidor')
+    projects = discover_projects(args.projects_dir)
+    if not projects:
+        print("❌ No se encontraron proyectos NRD con index.html")
+        return 1
+    try:
+        if args.worker_fd is not None:
+            _run_worker(args)
+        elif args.processes > 0:
+            _run_prefork(args, projects)
+        else:
+            _run_single(args, projects)
+    except PermissionError as e:
+        if port < 1024:
+            print(f"❌ Error: Se requieren permisos de administrador para usar el puerto {port}")
+            print(f"   Ejecuta con sudo: sudo ./restart.sh {port}")
+            print(f"   O usa un puerto mayor a 1024: ./restart.sh 8006")
+        else:
+            print(f"❌ Error de permisos: {e}")
+        return 1
+    except OSError as e:
+        if "Address already in use" in str(e):
+            print(f"⚠️  El puerto {port} ya está en uso")
+            print(f"   Accede a: http://localhost:{port}/")
+        elif "Permission denied" in str(e) or "Operation not permitted" in str(e):
+            print(f"❌ Error: Se requieren permisos de administrador para usar el puerto {port}")
+            print(f"   Ejecuta con sudo: sudo ./restart.sh {port}")
+            print(f"   O usa un puerto mayor a 1024: ./restart.sh 8006")
+        else:
+            print(f"❌ Error: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor detenido")
+        return 0
+    except Exception as e:
+        print(f"❌ Error inesperado: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        profiler.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 #!/bin/bash
 
 # Script para reiniciar el servidor HTTP local de todos los proyectos NRD.
-# Si el puerto está en uso, lo libera y luego inicia el servidor.
+# Si el servidor ya corre en modo multi-proceso (pid file), lo recarga sin cortes con SIGHUP.
+# Si no, libera el puerto si está en uso y luego inicia el servidor.
 # Uso: ./server-toggle.sh [puerto]
 # Ejemplo: ./server-toggle.sh
 # Ejemplo: ./server-toggle.sh 8006
@@ -23,6 +24,22 @@ if [ -n "$1" ]; then
     PORT=$1
 fi
 
+# Procesos worker del servidor (pre-fork): permiten recargar con SIGHUP sin cortar requests
+PROCESSES="${NRD_SERVER_PROCESSES:-2}"
+PID_FILE="/tmp/nrd-server-$PORT.pid"
+
+# 0) Servidor multi-proceso ya corriendo: recarga sin cortes (workers nuevos antes de drenar los viejos)
+if [ -f "$PID_FILE" ]; then
+    MASTER_PID=$(cat "$PID_FILE" 2>/dev/null)
+    if [ -n "$MASTER_PID" ] && kill -0 "$MASTER_PID" 2>/dev/null && kill -HUP "$MASTER_PID" 2>/dev/null; then
+        echo "🔄 Servidor recargado sin cortes (PID maestro: $MASTER_PID)"
+        echo "   Accede a: http://localhost:$PORT/"
+        echo "   Log: /tmp/nrd-server.log"
+        exit 0
+    fi
+    rm -f "$PID_FILE"
+fi
+
 # Función para verificar si el puerto está en uso
 check_port() {
     lsof -ti:$PORT > /dev/null 2>&1
@@ -65,30 +82,10 @@ fi
 echo "🚀 Iniciando servidor HTTP para todos los proyectos NRD en el puerto $PORT..."
 echo "   Directorio base: $PROJECTS_DIR"
 
-# 2) Actualizar versiones de proyectos
-echo "📝 Actualizando versiones de proyectos..."
-for project_dir in "$PROJECTS_DIR"/nrd-*; do
-    if [ -d "$project_dir" ] && [ -f "$project_dir/index.html" ]; then
-        project_name=$(basename "$project_dir")
-        UPDATE_VERSION_SCRIPT="$project_dir/tools/update-version/update-version.py"
-        if [ -f "$UPDATE_VERSION_SCRIPT" ]; then
-            python3 "$UPDATE_VERSION_SCRIPT" "$project_name" 2>/dev/null || python3 "$UPDATE_VERSION_SCRIPT" 2>/dev/null || true
-        fi
-    fi
-done
-
-# 3) Comprobar de nuevo que el puerto siga libre (por si algo lo tomó durante update-version)
-if check_port; then
-    echo "⚠️  El puerto $PORT se ocupó durante la actualización, liberando de nuevo..."
-    if ! free_port; then
-        exit 1
-    fi
-fi
-
-# 4) Iniciar el servidor Python
+# 2) Iniciar el servidor Python (actualiza las versiones de los proyectos en segundo plano)
 SERVER_SCRIPT="$SCRIPT_DIR/nrd-system-server.py"
 cd "$PROJECTS_DIR"
-python3 "$SERVER_SCRIPT" "$PORT" > /tmp/nrd-server.log 2>&1 &
+python3 "$SERVER_SCRIPT" "$PORT" --processes "$PROCESSES" --pid-file "$PID_FILE" > /tmp/nrd-server.log 2>&1 &
 SERVER_PID=$!
 sleep 2
 
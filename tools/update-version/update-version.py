@@ -1,21 +1,275 @@
 #!/usr/bin/env python3
 """
-Actualiza los parámetros de versión en index.html para cache busting
-Uso: python3 update-version.py [proyecto]
+Actualiza los parámetros de versión en las páginas HTML de un proyecto para cache busting
+Modos:
+  hash (por defecto): cada archivo lleva ?v=<hash de su contenido>; se escribe
+    version-manifest.json (archivo -> hash), así los clientes solo descargan lo que cambió.
+    También se escribe precache-manifest.json (URL -> revisión), que el service worker usa
+    para descargar solo las entradas nuevas.
+  timestamp: todos los archivos llevan el mismo ?v=<timestamp> (comportamiento anterior);
+    se borran los manifests del modo hash.
+version.json es {"v": <timestamp en ms>} como siempre (un entero que solo crece); en modo hash
+lleva además "hash" (digest del manifest) y v solo cambia cuando cambia ese digest.
+Las páginas se reescriben en una sola pasada y solo se escriben si cambió el contenido
+(reemplazo atómico), para no disparar el live reload del servidor sin motivo.
+Uso: python3 update-version.py [proyecto ...] [--all] [--mode hash|timestamp] [--profile]
+También se puede elegir el modo con NRD_VERSION_MODE.
+--profile (o NRD_PROFILE=1) imprime los tiempos por fase: discovery, version update, render, hash y write.
 """
 
+import argparse
+import hashlib
+import json
+import os
 import re
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import unquote
 
-def update_version(project_name=None):
-    # Generate timestamp version
-    version = int(datetime.now().timestamp() * 1000)
-    
+MODE_HASH = "hash"
+MODE_TIMESTAMP = "timestamp"
+HASH_LENGTH = 10  # caracteres hex del hash por archivo
+MANIFEST_NAME = 'version-manifest.json'
+PRECACHE_MANIFEST_NAME = 'precache-manifest.json'
+VERSION_NAME = 'version.json'
+# Archivos que se precachean aunque las páginas no los referencien con ?v= (iconos del PWA, manifest)
+PRECACHE_EXTRA_GLOBS = ('manifest.json', 'favicon.ico', 'assets/icons/*.png', 'assets/icons/*.ico')
+
+# Una sola expresión para las tres referencias versionadas; el ?v= previo (timestamp o hash)
+# queda fuera de la URL capturada, así quitar y poner la versión es el mismo reemplazo.
+# Las URLs externas (CDN) no coinciden y conservan sus parámetros.
+_VERSIONED_REF = re.compile(
+    r'(?P<link><link[^>]*href=["\'])(?P<css>(?!https?://)[^"\']*styles\.css)(?:\?v=[0-9a-f]+)?(?P<link_end>["\'][^>]*>)'
+    r'|(?P<script><script[^>]*src=["\'])(?P<js>(?!https?://)[^"\']+\.js)(?:\?v=[0-9a-f]+)?(?P<script_end>["\'][^>]*>)'
+    r'|(?P<sw>serviceWorker\.register\(["\'])(?P<sw_url>[^"\']*service-worker\.js)(?:\?v=[0-9a-f]+)?(?P<sw_end>["\'])'
+)
+_REF_GROUPS = (('link', 'css', 'link_end'), ('script', 'js', 'script_end'), ('sw', 'sw_url', 'sw_end'))
+
+
+# Instrumentación compartida (tools/profiling/nrd_profiling.py): un solo profiler por proceso
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'profiling'))
+import nrd_profiling as profiling
+
+
+@profiling.PROFILER.timed('hash')
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+@profiling.PROFILER.timed('write')
+def _write_if_changed(path, content):
+    """Escribe content (str) en path solo si difiere de lo que ya hay. Devuelve True si escribió."""
+    data = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    # Reemplazo atómico: quien lea (servidor, navegador) ve el archivo viejo o el nuevo, nunca uno a medias
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+class _HashCache:
+    """Hashes por ruta absoluta, validados por mtime y tamaño; se comparte entre proyectos (p. ej. /nrd-common/...)."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_path):
+        st = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        file_hash = _file_hash(file_path)
+        with self._lock:
+            self._entries[key] = (st.st_mtime_ns, st.st_size, file_hash)
+        return file_hash
+
+
+class _ContentHasher:
+    """Resuelve URLs locales de las páginas a archivos del proyecto y calcula su hash (una vez por archivo)."""
+
+    def __init__(self, project_root, projects_dir, cache=None):
+        self.project_root = project_root
+        self.projects_dir = projects_dir
+        self.cache = cache or _HashCache()
+        self.manifest = {}  # ruta relativa al proyecto (o /absoluta) -> hash
+
+    def version_for(self, url):
+        path = unquote(url.split('?', 1)[0].split('#', 1)[0])
+        if path.startswith('/'):
+            file_path = self.projects_dir / path.lstrip('/')
+            key = path
+        else:
+            file_path = self.project_root / path
+            key = os.path.normpath(path).replace(os.sep, '/')
+        if key not in self.manifest:
+            try:
+                self.manifest[key] = self.cache.get(file_path)
+            except OSError:
+                return None  # archivo inexistente: se deja sin ?v=
+        return self.manifest[key]
+
+    def add_file(self, relative_path):
+        """Añade al manifest un archivo del proyecto que no se referencia desde las páginas."""
+        try:
+            self.manifest[relative_path] = self.cache.get(self.project_root / relative_path)
+        except OSError:
+            pass
+
+    def digest(self):
+        payload = json.dumps(self.manifest, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()[:HASH_LENGTH + 2]
+
+
+def _precache_manifest(manifest, version, unversioned):
+    """Entradas para el service worker: los assets referenciados van con su URL versionada
+    (la misma que pide la página, así se pueden servir desde caché sin ir a la red);
+    las páginas y los extras van con su URL normal y la revisión aparte."""
+    entries = []
+    for key, revision in sorted(manifest.items()):
+        if key.endswith('service-worker.js'):
+            continue  # el navegador gestiona el propio service worker
+        url = key if key in unversioned else f'{key}?v={revision}'
+        entries.append({'url': url, 'revision': revision})
+    return json.dumps({'version': version, 'entries': entries}, indent=2) + '\n'
+
+
+def _rewrite_html(html, versioned):
+    """Pone ?v= a las referencias locales de html en una sola pasada."""
+    def replace(m):
+        for start, url, end in _REF_GROUPS:
+            if m.group(start) is not None:
+                return f'{m.group(start)}{versioned(m.group(url))}{m.group(end)}'
+        return m.group(0)
+    return _VERSIONED_REF.sub(replace, html)
+
+
+def _version_json(path, digest):
+    """Contenido de version.json: v entero (ms); con digest, v se conserva mientras el digest no cambie."""
+    now = int(datetime.now().timestamp() * 1000)
+    if digest is None:
+        return json.dumps({'v': now})
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    v = previous.get('v') if isinstance(previous, dict) else None
+    if not isinstance(v, int):
+        v = now
+    elif previous.get('hash') != digest:
+        v = max(now, v + 1)
+    return json.dumps({'v': v, 'hash': digest})
+
+
+def _resolve_mode(mode):
+    """Modo pedido (o NRD_VERSION_MODE, o hash); ValueError si no es hash ni timestamp."""
+    resolved = (mode or os.environ.get('NRD_VERSION_MODE') or MODE_HASH).lower()
+    if resolved not in (MODE_HASH, MODE_TIMESTAMP):
+        raise ValueError(f"modo de versión desconocido: {resolved!r} (usar {MODE_HASH} o {MODE_TIMESTAMP})")
+    return resolved
+
+
+def _default_projects_dir():
     script_dir = Path(__file__).parent.resolve()
     common_dir = script_dir.parent.parent.resolve()
-    projects_dir = common_dir.parent
+    return common_dir.parent
+
+
+def _update_project(project_root, projects_dir, mode, cache=None):
+    """Versiona las páginas de project_root. Devuelve (versión, archivos escritos)."""
+    pages = sorted(p for p in project_root.glob('*.html') if p.is_file())
+    hasher = _ContentHasher(project_root, projects_dir, cache) if mode == MODE_HASH else None
+    # Generate timestamp version
+    version = int(datetime.now().timestamp() * 1000)
+
+    def versioned(url):
+        if hasher is None:
+            return f'{url}?v={version}'
+        file_version = hasher.version_for(url)
+        return f'{url}?v={file_version}' if file_version else url
+
+    written = []
+    rendered = {}
+    for page in pages:
+        with profiling.phase('render'):
+            with open(page, 'r', encoding='utf-8') as f:
+                html = _rewrite_html(f.read(), versioned)
+        rendered[page.name] = html
+        if _write_if_changed(page, html):
+            written.append(page.name)
+
+    if hasher is not None:
+        unversioned = set(rendered)
+        for pattern in PRECACHE_EXTRA_GLOBS:
+            for path in sorted(project_root.glob(pattern)):
+                relative_path = path.relative_to(project_root).as_posix()
+                if relative_path not in hasher.manifest:
+                    hasher.add_file(relative_path)
+                    unversioned.add(relative_path)
+        # El HTML también forma parte de la versión: si cambia su markup, cambia version.json
+        for name, html in rendered.items():
+            hasher.manifest[name] = hashlib.sha256(html.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+        manifest = json.dumps(hasher.manifest, indent=2, sort_keys=True) + '\n'
+        if _write_if_changed(project_root / MANIFEST_NAME, manifest):
+            written.append(MANIFEST_NAME)
+        version = hasher.digest()
+        precache = _precache_manifest(hasher.manifest, version, unversioned)
+        if _write_if_changed(project_root / PRECACHE_MANIFEST_NAME, precache):
+            written.append(PRECACHE_MANIFEST_NAME)
+    else:
+        # En modo timestamp no hay revisiones por archivo: sin manifests el service worker no precachea
+        for name in (MANIFEST_NAME, PRECACHE_MANIFEST_NAME):
+            try:
+                (project_root / name).unlink()
+                written.append(name)
+            except FileNotFoundError:
+                pass
+
+    # Write version.json so the client can validate against server (avoid stale cache)
+    version_json = _version_json(project_root / VERSION_NAME, version if hasher is not None else None)
+    if _write_if_changed(project_root / VERSION_NAME, version_json):
+        written.append(VERSION_NAME)
+    return version, written
+
+
+def update_version(project_name=None, projects_dir=None, verbose=True, mode=None):
+    """Actualiza las páginas HTML y version.json de un proyecto. Devuelve la versión o None si no se pudo.
+
+    projects_dir permite usarlo importado (p. ej. desde el servidor) sobre otro árbol de proyectos;
+    con verbose=False no imprime nada, para poder llamarlo desde varios threads.
+    Lanza ValueError si mode no es MODE_HASH, MODE_TIMESTAMP o None.
+    """
+    mode = _resolve_mode(mode)
+    projects_dir = Path(projects_dir) if projects_dir is not None else _default_projects_dir()
     
     # Si se especifica proyecto, usar ese; si no, detectar desde el directorio actual
     if project_name:
@@ -30,58 +284,85 @@ def update_version(project_name=None):
             print("❌ Error: No se especificó el proyecto y no se puede detectar automáticamente")
             print("   Uso: python3 update-version.py [proyecto]")
             print("   Ejemplo: python3 update-version.py nrd-rrhh")
-            return
+            return None
     
     html_path = project_root / 'index.html'
     
     if not html_path.exists():
-        print(f"❌ Error: {html_path} no encontrado")
-        return
-    
-    # Read index.html
-    with open(html_path, 'r', encoding='utf-8') as f:
-        html = f.read()
+        if verbose:
+            print(f"❌ Error: {html_path} no encontrado")
+        return None
     
-    # Remove existing version parameters from local files
-    # Keep version parameters for external CDN URLs
-    html = re.sub(r'(\?v=\d+)(?=["\']|$)', '', html)
+    with profiling.phase('version update'):
+        version, written = _update_project(project_root, projects_dir, mode)
     
-    # Add version parameter to CSS files (local only)
-    # Match both styles.css and assets/styles/styles.css
-    html = re.sub(
-        r'(<link[^>]*href=["\'])([^"\']*styles\.css)(["\'][^>]*>)',
-        lambda m: f'{m.group(1)}{m.group(2)}?v={version}{m.group(3)}' if '?v=' not in m.group(2) else m.group(0),
-        html
-    )
-    
-    # Add version parameter to local JS files
-    # Match script tags with src pointing to local files (not http:// or https://)
-    html = re.sub(
-        r'(<script[^>]*src=["\'])((?!https?://)[^"\']+\.js)(["\'][^>]*>)',
-        lambda m: f'{m.group(1)}{m.group(2)}?v={version}{m.group(3)}' if '?v=' not in m.group(2) else m.group(0),
-        html
-    )
-    
-    # Add version parameter to service worker
-    html = re.sub(
-        r'(serviceWorker\.register\(["\'])([^"\']*service-worker\.js)(["\'])',
-        rf'\1\2?v={version}\3',
-        html
-    )
-    
-    # Write back
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html)
-    
-    # Write version.json so the client can validate against server (avoid stale cache)
-    import json
-    version_path = project_root / 'version.json'
-    with open(version_path, 'w', encoding='utf-8') as f:
-        json.dump({'v': version}, f)
-    
-    print(f"✅ Version updated to: {version}")
-    print(f"📝 Updated {html_path} with cache busting parameters")
+    if verbose:
+        if written:
+            print(f"✅ Version updated to: {version}")
+            print(f"📝 Updated {', '.join(written)} in {project_root}")
+        else:
+            print(f"✅ Version {version} ya al día ({project_root.name}), sin cambios")
+    return version
+
+
+def update_versions(project_names=None, projects_dir=None, verbose=True, mode=None, max_workers=8):
+    """Versiona varios proyectos en una sola llamada (todos los nrd-* con index.html si no se indican).
+
+    Los hashes de archivos compartidos se calculan una sola vez. Devuelve {proyecto: (versión, archivos escritos)},
+    con (None, []) para los que fallaron. Lanza ValueError si mode no es MODE_HASH, MODE_TIMESTAMP o None.
+    """
+    mode = _resolve_mode(mode)
+    projects_dir = Path(projects_dir) if projects_dir is not None else _default_projects_dir()
+    if project_names is None:
+        with profiling.phase('discovery'):
+            project_names = sorted(p.name for p in projects_dir.glob('nrd-*') if (p / 'index.html').is_file())
+    cache = _HashCache()
+
+    def run(project_name):
+        project_root = projects_dir / project_name
+        if not (project_root / 'index.html').is_file():
+            if verbose:
+                print(f"❌ Error: {project_root / 'index.html'} no encontrado")
+            return project_name, (None, [])
+        try:
+            with profiling.phase('version update'):
+                return project_name, _update_project(project_root, projects_dir, mode, cache)
+        except (OSError, UnicodeDecodeError) as e:
+            if verbose:
+                print(f"❌ Error actualizando {project_name}: {e}")
+            return project_name, (None, [])
+
+    if not project_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(project_names)))) as pool:
+        results = dict(pool.map(run, project_names))
+    if verbose:
+        for project_name, (version, written) in results.items():
+            if version is None:
+                continue
+            status = ', '.join(written) if written else 'sin cambios'
+            print(f"✅ {project_name}: {version} ({status})")
+    return results
+
 
 if __name__ == "__main__":
-    project_name = sys.argv[1] if len(sys.argv) > 1 else None
-    update_version(project_name)
+    parser = argparse.ArgumentParser(description="Actualiza el cache busting de las páginas HTML")
+    parser.add_argument('projects', nargs='*', metavar='proyecto',
+                        help="proyectos (por defecto, el del directorio actual)")
+    parser.add_argument('--all', action='store_true', help="todos los proyectos nrd-* con index.html")
+    parser.add_argument('--mode', choices=(MODE_HASH, MODE_TIMESTAMP),
+                        help="hash de contenido (por defecto) o timestamp global (env NRD_VERSION_MODE)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiling.configure_from_args(args, 'update-version')
+    try:
+        if args.all or len(args.projects) > 1:
+            results = update_versions(None if args.all else args.projects, mode=args.mode)
+            ok = bool(results) and all(v is not None for v, _ in results.values())
+        else:
+            ok = update_version(args.projects[0] if args.projects else None, mode=args.mode) is not None
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        ok = False
+    profiler.report()
+    sys.exit(0 if ok else 1)